@@ -106,6 +106,8 @@ class _TimetableSettings(QWidget):
         self.period_amt_edit = NumberTextEdit(1, 100)
         self.period_amt_edit.edit.setPlaceholderText("Period amount")
         
+        self.warm_start_checkbox = QCheckBox("Keep existing placements")
+        
         left_sub_option_widget = QWidget()
         
         left_sub_option_layout = QHBoxLayout()
@@ -118,6 +120,7 @@ class _TimetableSettings(QWidget):
         self.days_of_the_week_selector.closed.connect(closed_func)
         
         self.clash_viewer = ClashesViewer(self.editor.school)
+        self.feasibility_viewer = FeasibilityViewer(self.editor.school)
         
         dotw_button = QPushButton("Days of the Week")
         dotw_button.clicked.connect(self.days_of_the_week_selector.exec)
@@ -125,12 +128,17 @@ class _TimetableSettings(QWidget):
         show_clashes_checkb = QPushButton("Clashes")
         show_clashes_checkb.clicked.connect(self.clash_viewer.exec)
         
+        show_feasibility_button = QPushButton("Feasibility")
+        show_feasibility_button.clicked.connect(self.feasibility_viewer.exec)
+        
         left_sub_option_layout.addWidget(dotw_button)
         left_sub_option_layout.addWidget(show_clashes_checkb)
+        left_sub_option_layout.addWidget(show_feasibility_button)
         
         left_option_layout.addWidget(self.breakperiod_edit)
         left_option_layout.addWidget(self.period_amt_edit)
         left_option_layout.addWidget(left_sub_option_widget)
+        left_option_layout.addWidget(self.warm_start_checkbox)
         
         right_option_widget = QWidget()
         right_option_layout = QVBoxLayout()
@@ -140,10 +148,18 @@ class _TimetableSettings(QWidget):
         generate_button.setProperty("class", "safety")
         generate_button.clicked.connect(self.generate_new_school_timetable)
         
+        generate_changed_button = QPushButton("Generate Changed")
+        generate_changed_button.clicked.connect(self.generate_changed_school_timetable)
+        
+        repair_button = QPushButton("Repair")
+        repair_button.clicked.connect(self.repair_school_timetable)
+        
         refresh_button = QPushButton("Refresh")
         refresh_button.clicked.connect(lambda: self.refresh())
         
         right_option_layout.addWidget(generate_button)
+        right_option_layout.addWidget(generate_changed_button)
+        right_option_layout.addWidget(repair_button)
         right_option_layout.addWidget(refresh_button)
         
         general_settings_layout.addWidget(left_option_widget)
@@ -182,7 +198,21 @@ class _TimetableSettings(QWidget):
         self.saved_state_changed.emit()
         
         self._refresh()
-        self.editor.school.generateNewSchoolTimetables()
+        self.editor.school.generateNewSchoolTimetables(warmStart=self.warm_start_checkbox.isChecked())
+        self.editor.pending_regeneration.clear()
+    
+    def _generate_changed(self):
+        self.saved_state_changed.emit()
+        
+        self._refresh()
+        self.editor.school.regenerateClasses(self.editor.pending_regeneration, self.warm_start_checkbox.isChecked())
+        self.editor.pending_regeneration.clear()
+    
+    def _repair(self):
+        self.saved_state_changed.emit()
+        
+        self._refresh()
+        self.editor.school.repairTimetables()
     
     def timetable_refresh(self, period_amt: int | None, break_period: int | None, days_of_the_week: list[str], timetable: 'ClassTimetable'):
         if break_period is not None and break_period != int(sum(timetable.cls.timetable.breakTimePeriods) / len(timetable.cls.timetable.breakTimePeriods)):
@@ -234,7 +264,7 @@ class _TimetableSettings(QWidget):
                     period += subject.total
                     if period > period_amt:
                         new_total = period - period_amt
-                        subject.total = new_total
+                        subjects[index] = subject.withTotal(new_total)
                         subjects[index + 1:] = []
                         
                         break
@@ -318,6 +348,40 @@ class _TimetableSettings(QWidget):
             self.generate_new.start()
         else:
             QMessageBox.warning(self, "Generating", "Timetable is already being generated")
+    
+    def generate_changed_school_timetable(self):
+        if self._can_generate_new:
+            if not self.editor.pending_regeneration:
+                QMessageBox.information(self, "Generator", "No class has changed since the last generation")
+                return
+            
+            if not self._continue_with_irreversable_action():
+                return
+            
+            self._can_generate_new = False
+            
+            self.generate_new = Thread(self.editor.main_window, self._generate_changed)
+            self.generate_new.finished.connect(self._generating_finished)
+            self.generate_new.start()
+        else:
+            QMessageBox.warning(self, "Generating", "Timetable is already being generated")
+    
+    def repair_school_timetable(self):
+        if self._can_generate_new:
+            if not self.editor.timetable_widgets:
+                QMessageBox.critical(self, "Repair Error", "Nothing to repair")
+                return
+            
+            if not self._continue_with_irreversable_action():
+                return
+            
+            self._can_generate_new = False
+            
+            self.generate_new = Thread(self.editor.main_window, self._repair)
+            self.generate_new.finished.connect(self._generating_finished)
+            self.generate_new.start()
+        else:
+            QMessageBox.warning(self, "Generating", "Timetable is already being generated")
 
 class ClassTimetable(QTableWidget):
     def __init__(self, cls: Class, editor: 'TimeTableEditor', remainder_layout: QVBoxLayout):
@@ -364,7 +428,8 @@ class ClassTimetable(QTableWidget):
         self.current_source = None
     
     def get_max_subject_amount(self):
-        periods, break_periods, _ = self.editor.school.project["levels"][self.cls.index][1][self.cls.classID][1]
+        class_info = self.editor.school.schema.getClass(self.cls.index, self.cls.classID)
+        periods, break_periods = class_info.periodsPerDay, class_info.breakPeriods
         
         max_subject_amt = 0
         
@@ -507,32 +572,35 @@ class ClassTimetable(QTableWidget):
     
     def save_timetable(self):
         """Save current grid state back to timetable"""
-        for col, (day, _, _) in enumerate(self.timetable.weekInfo):
-            subjects = []
+        slot_grid = SlotGrid([day for day, _, _ in self.timetable.weekInfo], [self.rowCount() for _ in self.timetable.weekInfo], subjects=self.cls.subjects)
+        
+        for col in range(len(slot_grid.days)):
             for row in range(self.rowCount()):
                 item = self.item(row, col)
                 if isinstance(item, TimeTableItem) and item.subject:
-                    if (subjects and subjects[len(subjects) - 1].uniqueID != item.subject.uniqueID) or not subjects:
-                        subjects.append(item.subject)
-                        
-                        if item.subject.id not in (self.timetable.freePeriodID, self.timetable.breakPeriodID):
-                            coords = [
-                                (col, row),
-                                (item.subject.total, item.subject.perWeek),
-                                len([1 for label in self.remainder_labels if label.subject.id == item.subject.id])
-                            ]
-                            
-                            self.editor.school.project["subjects"][item.subject.id][1][str(self.cls.index)][2][self.cls.classID][1].append(coords)
-                        
-            self.timetable.table[day] = subjects
+                    slot_grid.set(col, row + 1, item.subject)
+        
+        self.timetable.setFromSlotGrid(slot_grid)
+        
+        for col, (day, subjects) in enumerate(self.timetable.table.items()):
+            for index, subject in enumerate(subjects):
+                if subject.id not in (self.timetable.freePeriodID, self.timetable.breakPeriodID):
+                    coords = [
+                        (col, subjects.startOf(index) - 1),
+                        (subject.total, subject.perWeek),
+                        len([1 for label in self.remainder_labels if label.subject.id == subject.id])
+                    ]
+                    
+                    self.editor.school.schema.getPlacement(subject.id, self.cls.index, self.cls.classID).coords.append(coords)
     
     def populate_timetable(self):
         """Load the timetable data into the grid"""
         for col, (day, _, _) in enumerate(self.timetable.weekInfo):
-            total_s_names = list(flatten([[subj for _ in range(subj.total)] for subj in self.timetable.table[day]]))
-            subjects = total_s_names + [Subject(self.cls.timetable.freePeriodID, "Free", 1, 1, None) for _ in range(max(self.timetable.periodsPerDay) - len(total_s_names))]
+            subjects = self.timetable.table[day]
             
-            for row, subject in enumerate(subjects):
+            for row in range(max(self.timetable.periodsPerDay)):
+                subject = subjects.subjectAt(row + 1) or freeBlock(1)
+                
                 item = TimeTableItem(subject, row + 1 == self.cls.breakTimePeriods[col], subject.id == self.cls.timetable.freePeriodID)
                 self.setItem(row, col, item)
         
@@ -550,7 +618,7 @@ class ClassTimetable(QTableWidget):
     def show_context_menu(self, pos):
         item = self.itemAt(pos)
         
-        if item and isinstance(item, TimeTableItem) and not item.break_time:
+        if item and isinstance(item, TimeTableItem) and not item.break_time and not item.free_period:
             menu = QMenu(self)
             delete_action = menu.addAction("Delete")
             if item.subject.lockedPeriod:
@@ -571,8 +639,18 @@ class ClassTimetable(QTableWidget):
             elif action and action.text() == "Lock to Period":
                 item.subject.lockedPeriod = [self.row(item), 1]  # Lock to current period
                 item.locked = True
+                self.set_class_lock(item.subject.id, item.subject.lockedPeriod)
             elif action and action.text() == "Unlock Period":
                 item.subject.lockedPeriod = None
+                self.set_class_lock(item.subject.id, None)
+    
+    def set_class_lock(self, subject_id: str, locked_period: list[int] | None):
+        # The grid holds copies, but feasibility and Explain check the class's own subjects, as checkClass does
+        for subject in self.cls.subjects:
+            if subject.id == subject_id:
+                subject.lockedPeriod = list(locked_period) if locked_period else None
+        
+        self.editor.update_feasibility()
     
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -629,6 +707,9 @@ class TimeTableEditor(QWidget):
         
         self.class_data: dict[str, dict[str, bool | OptionSelector]] = {}
         
+        # Classes touched by data edits since their last generation
+        self.pending_regeneration: set[str] = set()
+        
         # Create scroll area for timetables
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
@@ -650,13 +731,26 @@ class TimeTableEditor(QWidget):
         # Create settings for timetables
         self.settings_widget = _TimetableSettings(self, self.progress_bar, self.info["DOTW"], self.saved_state_changed)
         
+        # Kept up to date with every data change, so problems show before anything is generated
+        self.feasibility_label = QLabel()
+        self.feasibility_label.setWordWrap(True)
+        self.feasibility_label.hide()
+        
         self.main_layout.addWidget(self.settings_widget)
+        self.main_layout.addWidget(self.feasibility_label)
         self.main_layout.addWidget(progress_bar_widget)
         self.main_layout.addWidget(self.scroll_area)
     
     def get(self):
         return self.info
     
+    def update_feasibility(self):
+        report = self.school.checkFeasibility()
+        
+        self.feasibility_label.setVisible(not report.isFeasible())
+        self.feasibility_label.setText(f"<b>{len(report.issues)} problem{'s' if len(report.issues) != 1 else ''} found, {len(report.impossibleClasses)} class{'es' if len(report.impossibleClasses) != 1 else ''} cannot be completed.</b> Open Feasibility in the settings menu for details")
+        self.feasibility_label.setToolTip("\n".join(report.getSummary()))
+    
     def set_editor_from_school(self, school: School):
         self.school = school
         
@@ -683,9 +777,11 @@ class TimeTableEditor(QWidget):
     def refresh(self):
         prev_project = self.school.project.copy()
         self.school.setProjectDictFromSchoolInfo()
-        self.school.__init__(self.school.project)
+        self.school.__init__(self.school.project, self.school.seed)
         self.school.setSchoolInfoFromProjectDict()
         
+        self.update_feasibility()
+        
         if prev_project != self.school.project:
             self.saved_state_changed.emit()
     
@@ -725,12 +821,8 @@ class TimeTableEditor(QWidget):
                         teacher_name = teacher_info_entry["text"][0]
                         
                         if teacher_info_entry["classes"]["content"][subject_id][class_id][0] is not None:
-                            selected_class_options = []
-                            stm_subjects_data = self.school.project["subjectTeacherMapping"].get(subject_id)
-                            cls_index = next((str(class_index) for class_index, cls_id in enumerate(classes_info) if cls_id == class_id), None)
-                            
-                            if None not in (stm_subjects_data, cls_index):
-                                selected_class_options = stm_subjects_data[1].get(teacher_id, (_, {}))[1].get(cls_index, (_, []))[1]
+                            teacher_level = self.school.schema.getTeacherLevel(subject_id, teacher_id, class_index)
+                            selected_class_options = teacher_level.classIDs if teacher_level is not None else []
                         elif sum(list(teacher_info_entry["classes"]["content"][subject_id][class_id][1].values())):
                             selected_class_options = []
                             
@@ -765,7 +857,7 @@ class TimeTableEditor(QWidget):
                 [
                     option_text,
                     (
-                        self.school.project["levels"][class_index][1][class_id + option_id]
+                        self._get_class_level_info(class_index, class_id, option_id)
                         if self._certify_class_level_info(class_index, class_id, option_id) else
                         [
                             [self.main_window.default_period_amt for _ in range(len(self.main_window.default_weekdays))],
@@ -832,20 +924,25 @@ class TimeTableEditor(QWidget):
             project_update["subjects"] = subjects
         
         main_window_school: School = self.main_window.school
+        previous_signatures = main_window_school.getClassSignatures()
         
         self.main_window.save_data.update(project_update)
         main_window_school.setProjectData(self.main_window.save_data)
         main_window_school.setSchoolInfoFromProjectDict()
         
+        self.pending_regeneration |= main_window_school.getAffectedClasses(main_window_school.getChangedClasses(previous_signatures))
+        
         self.school = main_window_school
         self.set_editor_from_school(self.school)
+        self.update_feasibility()
     
     def _certify_class_level_info(self, class_index: int, class_id: str, option_id: str):
-        if class_index < len(self.school.project["levels"]):
-            if class_id + option_id in self.school.project["levels"][class_index][1]:
-                return True
+        return self.school.schema.getClass(class_index, class_id + option_id) is not None
+    
+    def _get_class_level_info(self, class_index: int, class_id: str, option_id: str):
+        class_info = self.school.schema.getClass(class_index, class_id + option_id)
         
-        return False
+        return [class_info.periodsPerDay, class_info.breakPeriods, class_info.weekdays]
     
     def _set_school_timetable(self):
         for _, cls in self.school.classes.items():
@@ -883,7 +980,9 @@ class TimeTableEditor(QWidget):
                 
                 _refresh_func()
                 
-                generate_new = Thread(self.main_window, lambda: self.school.generateTimetable(timetable.cls))
+                self.pending_regeneration.discard(timetable.cls.uniqueID)
+                
+                generate_new = Thread(self.main_window, lambda: self.school.generateTimetable(timetable.cls, self.settings_widget.warm_start_checkbox.isChecked()))
                 generate_new.finished.connect(lambda: self._timetable_generating_finished(timetable.cls.uniqueID))
                 generate_new.start()
         
@@ -897,10 +996,20 @@ class TimeTableEditor(QWidget):
         
             _refresh_func()
         
+        def explain_func():
+            report = self.school.explainTimetable(timetable.cls)
+            
+            if report.isFeasible():
+                QMessageBox.information(self, "Explain", f"No conflicting settings were found for {timetable.cls.name}\n"
+                                                         "Any leftovers come from how the lessons were arranged, so generating again may place them")
+            else:
+                QMessageBox.information(self, "Explain", f"{timetable.cls.name} cannot fit all its lessons because of:\n\n" + "\n".join(report.getSummary()))
+        
         return {
             "new": new_func,
             "weekdays": self.class_data[timetable.cls.uniqueID]["option_selector"].exec,
             "refresh": refresh_func,
+            "explain": explain_func,
         }
     
     def _make_timetable_settings(self, timetable: ClassTimetable, layout: QVBoxLayout):
@@ -925,6 +1034,10 @@ class TimeTableEditor(QWidget):
         refresh_button.setFixedWidth(95)
         refresh_button.clicked.connect(func_info["refresh"])
         
+        explain_button = QPushButton("Explain")
+        explain_button.setFixedWidth(95)
+        explain_button.clicked.connect(func_info["explain"])
+        
         layout.addWidget(period_amt_edit)
         layout.addWidget(breakperiod_edit)
         layout.addSpacing(5)
@@ -932,6 +1045,7 @@ class TimeTableEditor(QWidget):
         layout.addSpacing(20)
         layout.addWidget(generate_new_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         layout.addWidget(refresh_button, alignment=Qt.AlignmentFlag.AlignHCenter)
+        layout.addWidget(explain_button, alignment=Qt.AlignmentFlag.AlignHCenter)
     
     def _make_timetable_for_each_class(self, cls: Class):
         widget = QWidget()
@@ -2,6 +2,7 @@ from imports import *
 
 from middle.main import School
 from middle.objects import *
+from middle.ttbl import *
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
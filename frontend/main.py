@@ -15,7 +15,7 @@ class Window(QMainWindow):
         self.export_file_filter = "JSON File (*.json);;Image File (*.png *.jpg *.wpeg *.svg);;Microsoft Document (*.msix);;Pickle File (*.pickle);;CSV File (*.csv);;HTML File (*.html);;PDF File (*.pdf)"
         
         self.file = FileManager(self, path, f"Timetable Files (*.{EXTENSION_NAME})")
-        self.file.set_callbacks(self.save_callback, self.open_callback, self.load_callback, self.export_callback)
+        self.file.set_callbacks(self.save_callback, self.open_callback, self.load_callback, self.export_callback, self.save_finished_callback)
         
         # Default data
         self.default_period_amt   =   10  # Being used by the timetable editor
@@ -137,6 +137,7 @@ class Window(QMainWindow):
     
     def _init_save_data(self):
         self.saved = True
+        self.edit_generation = 0
         self.uncompressed_path = None
         self.save_data = deepcopy(self.default_save_data)
         self.orig_data = deepcopy(self.save_data)
@@ -175,13 +176,11 @@ class Window(QMainWindow):
     
     def unsaved_callback(self):
         self.saved = False
+        self.edit_generation += 1
         self.setWindowTitle(f"{self.title} - {self.file.path} *Unsaved")
     
     def load_callback(self, path: str):
-        with gzip.open(path, "rb") as file:
-            content = json.load(file)
-        
-        return content
+        return readProjectFile(path)
     
     def open_callback(self, path: str| None = None):
         win = Window(self.app, ["main.py", path] if path is not None else [])
@@ -192,24 +191,33 @@ class Window(QMainWindow):
         self._windows.append(win)
     
     def save_callback(self, path: str):
-        self.saved = True
-        
         self.file.path = path
         
         self.update_interaction(self.display_index, self.prev_display_index)
         
         self.save_data.update(self.get_settings_info())
         
-        with gzip.open(self.file.path, "wb") as file:
-            file.write(json.dumps(self.save_data, indent=2).encode())
+        # A pickle round trip copies far faster than deepcopy, and the worker writes from the copy while editing goes on
+        snapshot = pickle.loads(pickle.dumps(self.save_data, pickle.HIGHEST_PROTOCOL))
+        self.orig_data = snapshot
         
-        if self.uncompressed_path is not None:
-            with open(self.uncompressed_path, "w") as u_file:
-                json.dump(self.save_data, u_file, indent=2)
+        # Edits after this point move the generation on, so the finished save can tell whether it is still current
+        self.saved = True
+        self.file.start_save(self.file.path, snapshot, self.uncompressed_path, self.edit_generation)
         
-        self.orig_data = deepcopy(self.save_data)
+        self.setWindowTitle(f"{self.title} - {self.file.path} *Saving")
+    
+    def save_finished_callback(self, path: str, error: Exception | None, generation: int):
+        # Whichever save finished last decides, so an earlier failure never outlives a later success
+        self.saved = error is None and generation == self.edit_generation
+        
+        if self.file.is_saving():
+            return
         
-        self.setWindowTitle(f"{self.title} - {self.file.path}")
+        if self.saved:
+            self.setWindowTitle(f"{self.title} - {path}")
+        else:
+            self.setWindowTitle(f"{self.title} - {path} *Unsaved")
     
     def export_callback(self, path: str, export_mode: int):
         self.update_interaction(self.prev_display_index, self.display_index)
@@ -369,6 +377,9 @@ class Window(QMainWindow):
         return super().keyPressEvent(a0)
     
     def closeEvent(self, event):
+        # Closing is the one place that waits on the disk, so a save in flight is never cut off and its result is known
+        self.file.wait_for_save()
+        
         if not self.saved:
             reply = QMessageBox.question(self, "Save", "Save before quitting?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel)
             
@@ -378,6 +389,8 @@ class Window(QMainWindow):
                 event.ignore()
                 return
         
+        self.file.wait_for_save()
+        
         event.accept()
     
     def make_option_button_func(self, index: int):
@@ -411,10 +424,8 @@ class Window(QMainWindow):
     def update_interaction(self, prev_index: int, curr_index: int):
         match prev_index:
             case 3:
-                for _, (_, info1) in self.school.project["subjects"].items():
-                    for _, (_, _, info2) in info1.items():
-                        for _, (_, info3) in info2.items():
-                            info3.clear()
+                for _, placement in self.school.schema.placements.items():
+                    placement.coords.clear()
                 
                 for _, cls in self.school.classes.items():
                     self.timetable_widget.timetable_widgets[cls.uniqueID].save_timetable()
@@ -6,8 +6,12 @@ EXTENSION_NAME = "ttbl"
 
 def gzip_file(input_file_path: str):
     try:
-        with gzip.open(input_file_path, "rb") as file:
-            json.load(file)
+        with open(input_file_path, "rb") as file:
+            header = file.read(len(TTBL_MAGIC))
+        
+        if not isContainer(header):
+            with gzip.open(input_file_path, "rb") as file:
+                json.load(file)
         
         return input_file_path, None
     except Exception as e:
@@ -46,6 +50,29 @@ class Thread(QThread):
 
 
 
+class SaveWorker(QThread):
+    def __init__(self, path: str, snapshot: dict, uncompressed_path: Optional[str] = None, generation: int = 0):
+        super().__init__()
+        
+        self.path = path
+        self.snapshot = snapshot
+        self.uncompressed_path = uncompressed_path
+        
+        # Handed back with the result, so the caller can tell which snapshot this save wrote
+        self.generation = generation
+        self.error: Optional[Exception] = None
+    
+    def run(self):
+        try:
+            writeProjectFile(self.path, self.snapshot)
+            
+            if self.uncompressed_path is not None:
+                writeFileAtomically(self.uncompressed_path, json.dumps(self.snapshot, indent=2).encode())
+        except Exception as e:
+            self.error = e
+
+
+
 class FileManager:
     def __init__(self, parent: QWidget, path: Optional[str], file_filter="Text Files (*.txt);;All Files (*)"):
         self.path = path
@@ -57,12 +84,54 @@ class FileManager:
         self.save_callback: Optional[Callable[[str | None], str]] = None
         self.open_callback: Optional[Callable[[], None] | Callable[[str, Any], None]] = None
         self.load_callback: Optional[Callable[[str], Any]] = None
+        self.save_finished_callback: Optional[Callable[[str, Optional[Exception], int], None]] = None
+        
+        # Saves are written on a worker thread, one at a time
+        self.save_worker: Optional[SaveWorker] = None
+        self.pending_save: Optional[tuple[str, dict, Optional[str], int]] = None
 
-    def set_callbacks(self, save: Callable[[str | None], None], open_: Callable[[], None] | Callable[[str, Any], None], load: Callable[[str], Any], export: Callable[[str, int], None]):
+    def set_callbacks(self, save: Callable[[str | None], None], open_: Callable[[], None] | Callable[[str, Any], None], load: Callable[[str], Any], export: Callable[[str, int], None], save_finished: Optional[Callable[[str, Optional[Exception], int], None]] = None):
         self.save_callback = save
         self.open_callback = open_
         self.load_callback = load
         self.export_callback = export
+        self.save_finished_callback = save_finished
+    
+    def start_save(self, path: str, snapshot: dict, uncompressed_path: Optional[str] = None, generation: int = 0):
+        # Only the newest snapshot matters, so one asked for mid-write replaces any that is still waiting
+        if self.save_worker is not None:
+            self.pending_save = (path, snapshot, uncompressed_path, generation)
+            return
+        
+        worker = self.save_worker = SaveWorker(path, snapshot, uncompressed_path, generation)
+        worker.finished.connect(lambda: self._save_finished(worker))
+        worker.start()
+    
+    def _save_finished(self, worker: SaveWorker):
+        # Reached from the finished signal and from wait_for_save, whichever comes first
+        if worker is not self.save_worker:
+            return
+        
+        self.save_worker = None
+        
+        if worker.error is not None:
+            QMessageBox.critical(self.parent, type(worker.error).__name__, str(worker.error))
+        
+        if self.pending_save is not None:
+            pending_save, self.pending_save = self.pending_save, None
+            self.start_save(*pending_save)
+        
+        if self.save_finished_callback:
+            self.save_finished_callback(worker.path, worker.error, worker.generation)
+    
+    def is_saving(self):
+        return self.save_worker is not None
+    
+    def wait_for_save(self):
+        while self.save_worker is not None:
+            worker = self.save_worker
+            worker.wait()
+            self._save_finished(worker)
     
     def get_data(self):
         if self.path:
@@ -366,15 +435,11 @@ class ClashesViewer(QDialog):
         return widget, layout
     
     def update_clashes(self):
-        for cls in self.school.schoolDict:
-            for subject in cls.subjects:
-                clashes = self.school.findClashes(subject)
-                
-                for clash_subject, clash_cls in clashes:
-                    if clash_subject.teacher.id not in self.clashes:
-                        self.clashes[clash_subject.teacher.id] = []
-                    
-                    self.clashes[clash_subject.teacher.id].append(((subject, cls), (clash_subject, clash_cls)))
+        for (subject, cls), (clash_subject, clash_cls) in self.school.getClashPairs():
+            if clash_subject.teacher.id not in self.clashes:
+                self.clashes[clash_subject.teacher.id] = []
+            
+            self.clashes[clash_subject.teacher.id].append(((subject, cls), (clash_subject, clash_cls)))
     
     def display_clashes(self):
         for teacher_id, clash_data in self.clashes.items():
@@ -412,3 +477,55 @@ class ClashesViewer(QDialog):
         return super().exec()
 
 
+
+class FeasibilityViewer(QDialog):
+    def __init__(self, school: School):
+        super().__init__()
+        self.setWindowTitle("Feasibility Check")
+        
+        layout = QVBoxLayout(self)
+        
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        
+        self.container = QWidget()
+        self.main_layout = QVBoxLayout()
+        self.container.setLayout(self.main_layout)
+        
+        scroll_area.setWidget(self.container)
+        layout.addWidget(scroll_area)
+        
+        self.main_layout.setContentsMargins(10, 20, 20, 5)
+        self.main_layout.setSpacing(10)
+        
+        self.school = school
+    
+    def display_issues(self):
+        report = self.school.feasibilityReport
+        
+        if report.isFeasible():
+            self.main_layout.addWidget(QLabel("No problems found"))
+        
+        for issue in report.issues:
+            impossible = any(class_id in report.impossibleClasses for class_id in issue.classIDs)
+            
+            label = QLabel(f"<b>{'Impossible' if impossible else 'Warning'}:</b> {issue.message}")
+            label.setWordWrap(True)
+            
+            self.main_layout.addWidget(label)
+        
+        self.main_layout.addStretch()
+    
+    def reset(self):
+        while self.main_layout.count():
+            item = self.main_layout.takeAt(0)
+            
+            if item.widget() is not None:
+                item.widget().deleteLater()
+        
+        self.school.checkFeasibility()
+        self.display_issues()
+    
+    def exec(self):
+        self.reset()
+        return super().exec()
@@ -1,6 +1,10 @@
-import os, sys, time, gzip, json, random, shutil
+import os, sys, math, time, gzip, json, heapq, random, shutil, pickle
+
+import numpy as np
 
 from copy import deepcopy
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.cbook import flatten
 
 from typing import Any, Callable, Union, Optional
@@ -0,0 +1,246 @@
+import gc
+import tracemalloc
+
+from middle.main import *
+from middle.ttbl import *
+
+BENCHMARK_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+def makeBenchmarkProject(classAmt: int, subjectAmt: int = 10, levelAmt: int = 3, seed: int | None = 0) -> ProjectType:
+    rng = random.Random(seed)
+    
+    levels = []
+    for levelIndex in range(levelAmt):
+        levelClassAmt = classAmt // levelAmt + (1 if levelIndex < classAmt % levelAmt else 0)
+        levels.append([f"Level {levelIndex + 1}", {f"C{levelIndex}-{classIndex}": [f"Class {classIndex + 1}", [[10] * len(BENCHMARK_WEEKDAYS), [7] * len(BENCHMARK_WEEKDAYS), list(BENCHMARK_WEEKDAYS)]] for classIndex in range(levelClassAmt)}])
+    
+    # Roughly one teacher for every 8 classes of a level, so every teacher is shared between classes
+    subjectTeacherMapping = {}
+    for subjectIndex in range(subjectAmt):
+        subjectInfo = {"&timings": {}}
+        
+        for levelIndex, (_, classes) in enumerate(levels):
+            subjectInfo["&timings"][str(levelIndex)] = [rng.choice([1, 2]), rng.choice([3, 4, 5])]
+            
+            # Teachers with no listed classes are handed out over the level by _getSubjects
+            teacherAmt = max(len(classes) // 8, 1)
+            for teacherIndex in range(teacherAmt):
+                teacherID = f"T{subjectIndex}-{levelIndex}-{teacherIndex}"
+                subjectInfo[teacherID] = [f"Teacher {teacherID}", {str(levelIndex): [math.ceil(len(classes) / teacherAmt), []]}]
+        
+        subjectTeacherMapping[f"S{subjectIndex}"] = [f"Subject {subjectIndex + 1}", subjectInfo]
+    
+    return {"levels": levels, "subjectTeacherMapping": subjectTeacherMapping}
+
+def storeTimetableCoords(school: School):
+    # The coordinates the editor writes for every block when leaving the timetable view
+    for _, placement in school.schema.placements.items():
+        placement.coords.clear()
+    
+    for _, cls in school.classes.items():
+        timetable = cls.timetable
+        
+        # Loading adds a subject's remainders once for every block carrying them, so only its first block does
+        remainderAmounts = {}
+        for remainder in timetable.remainderContent:
+            remainderAmounts[remainder.id] = remainderAmounts.get(remainder.id, 0) + remainder.perWeek
+        
+        for col, (_, subjects) in enumerate(timetable.table.items()):
+            for index, subject in enumerate(subjects):
+                if subject.id not in (timetable.freePeriodID, timetable.breakPeriodID):
+                    remainderAmount = remainderAmounts.pop(subject.id, 0)
+                    school.schema.getPlacement(subject.id, cls.index, cls.classID).coords.append([(col, subjects.startOf(index) - 1), (subject.total, subject.perWeek), remainderAmount])
+
+def makeGeneratedProject(classAmt: int, seed: int | None = 0) -> ProjectType:
+    school = School(makeBenchmarkProject(classAmt, seed=seed), seed)
+    school.setSchoolInfoFromProjectDict()
+    school.generateNewSchoolTimetables()
+    storeTimetableCoords(school)
+    school.setProjectDictFromSchoolInfo()
+    
+    return school.project
+
+def unshareBlocks(school: School):
+    # The loader before shared blocks built a fresh Subject for every free and break block
+    for cls in school.classes.values():
+        for day, subjects in cls.timetable.table.items():
+            cls.timetable.table[day] = [Subject(subject.id, subject.name, subject.total, subject.perWeek, None) if isinstance(subject, SharedPeriod) else subject for subject in subjects]
+
+def measureSchoolMemory(project: ProjectType, shared: bool = True):
+    project = deepcopy(project)
+    gc.collect()
+    
+    tracemalloc.start()
+    
+    school = School(project)
+    school.setSchoolInfoFromProjectDict()
+    
+    if not shared:
+        unshareBlocks(school)
+    
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    subjectAmt = sum(1 for obj in gc.get_objects() if isinstance(obj, Subject))
+    
+    return school, size, peak, subjectAmt
+
+def memoryBenchmark(classAmt: int = 300, seed: int | None = 0):
+    print(f"Generating a project of {classAmt} classes....")
+    
+    orig_time = time.time()
+    project = makeGeneratedProject(classAmt, seed)
+    
+    print(f"Project generated after {time.time() - orig_time} seconds")
+    print()
+    
+    # The baseline only undoes block sharing, since the slotted classes cannot be switched off at runtime
+    for label, shared in (("Unshared blocks (baseline)", False), ("Shared blocks", True)):
+        print(f"Loading school from project with {label.lower()}....")
+        
+        orig_time = time.time()
+        school, size, peak, subjectAmt = measureSchoolMemory(project, shared)
+        
+        blockAmt = sum(len(subjects) for cls in school.classes.values() for subjects in cls.timetable.table.values())
+        
+        print(f"School loaded after {time.time() - orig_time} seconds")
+        print(f"{label}: {size / 1024:.1f} KiB held ({size / len(school.classes) / 1024:.2f} KiB per class), {peak / 1024:.1f} KiB peak, {blockAmt} timetable blocks, {subjectAmt} live Subject objects")
+        print()
+        
+        del school
+        gc.collect()
+
+def timeGetSubjects(classAmt: int, repeats: int = 3, seed: int | None = 0):
+    school = School(makeBenchmarkProject(classAmt, seed=seed), seed)
+    
+    times = []
+    for _ in range(repeats):
+        orig_time = time.perf_counter()
+        school._getSubjects()
+        times.append(time.perf_counter() - orig_time)
+    
+    return min(times)
+
+def subjectAssignmentBenchmark(classAmts: tuple[int, ...] = (10, 100, 300, 1000), seed: int | None = 0):
+    print("Assigning teachers to classes....")
+    print()
+    
+    for classAmt in classAmts:
+        duration = timeGetSubjects(classAmt, seed=seed)
+        print(f"{classAmt} classes: {duration * 1000:.2f} ms ({duration / classAmt * 1e6:.1f} us per class)")
+
+def timeProjectDict(classAmt: int, repeats: int = 5, seed: int | None = 0):
+    school = School(makeBenchmarkProject(classAmt, seed=seed), seed)
+    school.setSchoolInfoFromProjectDict()
+    
+    times = []
+    for _ in range(repeats):
+        orig_time = time.perf_counter()
+        school.setProjectDictFromSchoolInfo()
+        times.append(time.perf_counter() - orig_time)
+    
+    return min(times)
+
+def projectDictBenchmark(classAmts: tuple[int, ...] = (10, 100, 1000), seed: int | None = 0):
+    print("Building project dicts from school info....")
+    print()
+    
+    for classAmt in classAmts:
+        duration = timeProjectDict(classAmt, seed=seed)
+        print(f"{classAmt} classes: {duration * 1000:.2f} ms ({duration / classAmt * 1e6:.1f} us per class)")
+
+def timeSchemaAccess(classAmt: int, repeats: int = 5, seed: int | None = 0):
+    school = School(makeBenchmarkProject(classAmt, seed=seed), seed)
+    school.setSchoolInfoFromProjectDict()
+    school.setProjectDictFromSchoolInfo()
+    project = school.project
+    
+    loadTimes = []
+    for _ in range(repeats):
+        orig_time = time.perf_counter()
+        schema = ProjectSchema.fromProject(project)
+        loadTimes.append(time.perf_counter() - orig_time)
+    
+    keys = [(cls.classID, cls.index, subject.id, subject.teacher.id) for cls in school.classes.values() for subject in cls.subjects]
+    
+    # The nested reads setProjectDictFromSchoolInfo made before the schema, next to their schema lookups
+    rawTimes = []
+    schemaTimes = []
+    for _ in range(repeats):
+        orig_time = time.perf_counter()
+        for classID, levelIndex, subjectID, teacherID in keys:
+            project["subjectTeacherMapping"][subjectID][1][teacherID][1][str(levelIndex)][0]
+            project["subjects"][subjectID][1][str(levelIndex)][2][classID][1]
+        rawTimes.append(time.perf_counter() - orig_time)
+        
+        orig_time = time.perf_counter()
+        for classID, levelIndex, subjectID, teacherID in keys:
+            schema.getTeacherLevel(subjectID, teacherID, levelIndex).maxRandomAmt
+            schema.getPlacement(subjectID, levelIndex, classID).coords
+        schemaTimes.append(time.perf_counter() - orig_time)
+    
+    return min(loadTimes), min(rawTimes) / len(keys), min(schemaTimes) / len(keys)
+
+def schemaBenchmark(classAmts: tuple[int, ...] = (10, 100, 1000), seed: int | None = 0):
+    print("Validating projects and reading them through the schema....")
+    print()
+    
+    for classAmt in classAmts:
+        loadTime, rawTime, schemaTime = timeSchemaAccess(classAmt, seed=seed)
+        print(f"{classAmt} classes: validated in {loadTime * 1000:.2f} ms ({loadTime / classAmt * 1e6:.1f} us per class), nested read {rawTime * 1e9:.0f} ns, schema read {schemaTime * 1e9:.0f} ns")
+
+def getContainerFormats():
+    formats = [
+        ("gzip JSON (old)", lambda project: gzip.compress(json.dumps(project, indent=2).encode())),
+        ("ttbl, uncompressed", lambda project: dumpProject(project, COMPRESSION_NONE))
+    ]
+    
+    for level in (1, 6, 9):
+        formats.append((f"ttbl, gzip {level}", lambda project, level=level: dumpProject(project, COMPRESSION_GZIP, level)))
+    
+    if zstandard is not None:
+        for level in (3, 10, 19):
+            formats.append((f"ttbl, zstd {level}", lambda project, level=level: dumpProject(project, COMPRESSION_ZSTD, level)))
+    
+    return formats
+
+def timeContainer(project: ProjectType, dump: Callable[[ProjectType], bytes], repeats: int = 5):
+    saveTimes = []
+    loadTimes = []
+    for _ in range(repeats):
+        orig_time = time.perf_counter()
+        data = dump(project)
+        saveTimes.append(time.perf_counter() - orig_time)
+        
+        orig_time = time.perf_counter()
+        loadProject(data)
+        loadTimes.append(time.perf_counter() - orig_time)
+    
+    return len(data), min(saveTimes), min(loadTimes)
+
+def containerBenchmark(classAmts: tuple[int, ...] = (100, 300), seed: int | None = 0):
+    for classAmt in classAmts:
+        print(f"Generating a project of {classAmt} classes....")
+        project = makeGeneratedProject(classAmt, seed)
+        print()
+        
+        # The first format is the old gzip JSON that every other one is compared to
+        jsonSize = jsonLoadTime = None
+        for name, dump in getContainerFormats():
+            size, saveTime, loadTime = timeContainer(project, dump)
+            if jsonSize is None:
+                jsonSize, jsonLoadTime = size, loadTime
+            
+            print(f"{name}: {size / 1024:.1f} KiB ({size / jsonSize:.2f}x JSON), saved in {saveTime * 1000:.1f} ms, loaded in {loadTime * 1000:.1f} ms ({loadTime / jsonLoadTime:.2f}x JSON)")
+        print()
+
+if __name__ == "__main__":
+    memoryBenchmark()
+    print()
+    subjectAssignmentBenchmark()
+    print()
+    projectDictBenchmark()
+    print()
+    schemaBenchmark()
+    print()
+    containerBenchmark()
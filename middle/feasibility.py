@@ -0,0 +1,187 @@
+from middle.objects import *
+from middle.flow import *
+
+ISSUE_CLASS_CAPACITY = "class-capacity"
+ISSUE_SUBJECT_PER_DAY = "subject-per-day"
+ISSUE_LOCKED_PERIOD = "locked-period"
+ISSUE_TEACHER_LOAD = "teacher-load"
+ISSUE_TEACHER_BUSY = "teacher-busy"
+
+class FeasibilityIssue:
+    def __init__(self, kind: str, message: str, demand: int, capacity: int, classIDs: list[str], teacherID: str | None = None, subjectID: str | None = None) -> None:
+        self.kind = kind
+        self.message = message
+        
+        self.demand = demand
+        self.capacity = capacity
+        
+        self.classIDs = classIDs
+        self.teacherID = teacherID
+        self.subjectID = subjectID
+
+class FeasibilityReport:
+    def __init__(self) -> None:
+        self.issues: list[FeasibilityIssue] = []
+        
+        # Classes that cannot get a table without remainders whatever the other classes do
+        self.impossibleClasses: set[str] = set()
+    
+    def add(self, issue: FeasibilityIssue, impossible: bool = False):
+        self.issues.append(issue)
+        
+        if impossible:
+            self.impossibleClasses.update(issue.classIDs)
+    
+    def isFeasible(self):
+        return not self.issues
+    
+    def getIssues(self, classID: str | None = None, kind: str | None = None):
+        return [issue for issue in self.issues if (classID is None or classID in issue.classIDs) and (kind is None or issue.kind == kind)]
+    
+    def getSummary(self):
+        return [issue.message for issue in self.issues]
+
+def getDaySlots(cls: Class):
+    # (day, period) of every period a lesson can go in, periods being 1-based
+    return {(day, period) for day, periods, breakPeriod in cls.timetable.weekInfo for period in range(1, periods + 1) if period != breakPeriod}
+
+def checkClass(cls: Class, report: FeasibilityReport):
+    capacity = cls.timetable.getCapacity()
+    demand = sum(subject.PERWEEK for subject in cls.subjects)
+    
+    if demand > capacity:
+        report.add(FeasibilityIssue(ISSUE_CLASS_CAPACITY, f"{cls.name} needs {demand} periods a week but only has {capacity}", demand, capacity, [cls.uniqueID]), True)
+    
+    dayCapacities = [periods - (1 if 0 < breakPeriod <= periods else 0) for _, periods, breakPeriod in cls.timetable.weekInfo]
+    shortestDay = min((periods for _, periods, _ in cls.timetable.weekInfo), default=0)
+    
+    for subject in cls.subjects:
+        # A subject gets at most one block a day, and that block is never longer than its per-day total
+        weekCapacity = sum(min(subject.TOTAL, dayCapacity) for dayCapacity in dayCapacities)
+        
+        if subject.PERWEEK > weekCapacity:
+            report.add(FeasibilityIssue(ISSUE_SUBJECT_PER_DAY, f"{subject.name} in {cls.name} needs {subject.PERWEEK} periods a week but {subject.TOTAL} a day over {len(dayCapacities)} days only fits {weekCapacity}", subject.PERWEEK, weekCapacity, [cls.uniqueID], subject.teacher.id if subject.teacher is not None else None, subject.id), True)
+        
+        if subject.lockedPeriod and subject.lockedPeriod[0] + subject.lockedPeriod[1] > shortestDay:
+            report.add(FeasibilityIssue(ISSUE_LOCKED_PERIOD, f"{subject.name} in {cls.name} is locked to periods {subject.lockedPeriod[0] + 1} to {subject.lockedPeriod[0] + subject.lockedPeriod[1]}, past the end of a {shortestDay} period day", subject.lockedPeriod[0] + subject.lockedPeriod[1], shortestDay, [cls.uniqueID], subject.teacher.id if subject.teacher is not None else None, subject.id), True)
+
+def checkTeachers(classes: list[Class], report: FeasibilityReport):
+    teacherLoad: dict[str, int] = {}
+    teacherClasses: dict[str, dict[str, Class]] = {}
+    teachers: dict[str, Teacher] = {}
+    
+    for cls in classes:
+        for subject in cls.subjects:
+            if subject.teacher is not None:
+                teacherLoad[subject.teacher.id] = teacherLoad.get(subject.teacher.id, 0) + subject.PERWEEK
+                teacherClasses.setdefault(subject.teacher.id, {})[cls.uniqueID] = cls
+                teachers[subject.teacher.id] = subject.teacher
+    
+    # Classes with the same week share one slot set, so the unions below only see each layout once
+    layoutSlots: dict[tuple, set[tuple[str, int]]] = {}
+    
+    for teacherID, load in teacherLoad.items():
+        slots = set()
+        for cls in teacherClasses[teacherID].values():
+            layout = tuple(tuple(dayInfo) for dayInfo in cls.timetable.weekInfo)
+            if layout not in layoutSlots:
+                layoutSlots[layout] = getDaySlots(cls)
+            slots |= layoutSlots[layout]
+        
+        # A teacher is in one room per period, however many classes share that period
+        if load > len(slots):
+            report.add(FeasibilityIssue(ISSUE_TEACHER_LOAD, f"{teachers[teacherID].name} has {load} periods a week to teach but only {len(slots)} periods to teach them in", load, len(slots), list(teacherClasses[teacherID]), teacherID))
+
+def checkFeasibility(classes: list[Class]):
+    report = FeasibilityReport()
+    
+    for cls in classes:
+        checkClass(cls, report)
+    
+    checkTeachers(classes, report)
+    
+    return report
+
+def getPlaceableAmount(cls: Class, occupancy, constraints: set[tuple[str, str]]):
+    # Relaxation of the class's timetable as a flow: subject -> (subject, day) -> free slot. Only the
+    # constraints passed in apply; blocks do not have to be contiguous, so this only ever overestimates
+    network = FlowNetwork()
+    
+    for subject in cls.subjects:
+        if subject.teacher is None:
+            continue
+        
+        network.addEdge("&source", subject.id, subject.PERWEEK)
+        
+        for day, periods, breakPeriod in cls.timetable.weekInfo:
+            network.addEdge(subject.id, (subject.id, day), subject.TOTAL if (ISSUE_SUBJECT_PER_DAY, subject.id) in constraints else periods)
+            
+            for period in range(1, periods + 1):
+                if period == breakPeriod:
+                    continue
+                
+                if subject.lockedPeriod and (ISSUE_LOCKED_PERIOD, subject.id) in constraints and not subject.lockedPeriod[0] < period <= subject.lockedPeriod[0] + subject.lockedPeriod[1]:
+                    continue
+                
+                if (ISSUE_TEACHER_BUSY, subject.teacher.id) in constraints and occupancy.isBusy(subject.teacher.id, day, period, cls):
+                    continue
+                
+                network.addEdge((subject.id, day), (day, period), 1)
+    
+    for day, periods, breakPeriod in cls.timetable.weekInfo:
+        for period in range(1, periods + 1):
+            if period != breakPeriod:
+                network.addEdge((day, period), "&sink", 1)
+    
+    return network.maxFlow("&source", "&sink")
+
+def explainClass(cls: Class, occupancy):
+    report = FeasibilityReport()
+    
+    subjects = [subject for subject in cls.subjects if subject.teacher is not None]
+    demand = sum(subject.PERWEEK for subject in subjects)
+    
+    capacity = getPlaceableAmount(cls, occupancy, set())
+    if capacity < demand:
+        report.add(FeasibilityIssue(ISSUE_CLASS_CAPACITY, f"{cls.name} needs {demand} periods a week but only has {capacity}", demand, capacity, [cls.uniqueID]), True)
+        return report
+    
+    # Every constraint that can take a slot away from the class, each named by (kind, subject or teacher ID)
+    constraints = []
+    for subject in subjects:
+        if subject.TOTAL < max((periods for _, periods, _ in cls.timetable.weekInfo), default=0):
+            constraints.append((ISSUE_SUBJECT_PER_DAY, subject.id))
+        if subject.lockedPeriod:
+            constraints.append((ISSUE_LOCKED_PERIOD, subject.id))
+    for teacherID in dict.fromkeys(subject.teacher.id for subject in subjects):
+        constraints.append((ISSUE_TEACHER_BUSY, teacherID))
+    
+    placeable = getPlaceableAmount(cls, occupancy, set(constraints))
+    if placeable >= demand:
+        # Even the relaxation fits, so the leftovers come from block shapes or the search itself
+        return report
+    
+    # Deletion filtering: drop each constraint the conflict still holds without, what is left is irreducible
+    conflict = list(constraints)
+    for constraint in constraints:
+        remaining = [other for other in conflict if other != constraint]
+        if getPlaceableAmount(cls, occupancy, set(remaining)) < demand:
+            conflict = remaining
+    
+    subjectsByID = {subject.id: subject for subject in subjects}
+    teachers = {subject.teacher.id: subject.teacher for subject in subjects}
+    
+    for kind, key in conflict:
+        if kind == ISSUE_SUBJECT_PER_DAY:
+            subject = subjectsByID[key]
+            message = f"{subject.name} in {cls.name} is limited to {subject.TOTAL} period{'s' if subject.TOTAL != 1 else ''} a day"
+        elif kind == ISSUE_LOCKED_PERIOD:
+            subject = subjectsByID[key]
+            message = f"{subject.name} in {cls.name} is locked to periods {subject.lockedPeriod[0] + 1} to {subject.lockedPeriod[0] + subject.lockedPeriod[1]}"
+        else:
+            busy = sum(1 for day, periods, breakPeriod in cls.timetable.weekInfo for period in range(1, periods + 1) if period != breakPeriod and occupancy.isBusy(key, day, period, cls))
+            message = f"{teachers[key].name} is busy with other classes in {busy} of {cls.name}'s periods"
+        
+        report.add(FeasibilityIssue(kind, message, demand, placeable, [cls.uniqueID], key if kind == ISSUE_TEACHER_BUSY else subjectsByID[key].teacher.id, key if kind != ISSUE_TEACHER_BUSY else None), True)
+    
+    return report
@@ -0,0 +1,84 @@
+from imports import *
+
+class FlowNetwork:
+    def __init__(self) -> None:
+        self.nodes: dict[Any, int] = {}
+        
+        # Edge lists: edge e goes to heads[e] and edge e ^ 1 is its reverse
+        self.heads: list[int] = []
+        self.capacities: list[int] = []
+        self.adjacency: list[list[int]] = []
+    
+    def getNode(self, key):
+        if key not in self.nodes:
+            self.nodes[key] = len(self.nodes)
+            self.adjacency.append([])
+        
+        return self.nodes[key]
+    
+    def addEdge(self, start, end, capacity: int):
+        startNode = self.getNode(start)
+        endNode = self.getNode(end)
+        
+        edge = len(self.heads)
+        
+        self.heads += [endNode, startNode]
+        self.capacities += [capacity, 0]
+        
+        self.adjacency[startNode].append(edge)
+        self.adjacency[endNode].append(edge + 1)
+    
+    def _levels(self, source: int, sink: int):
+        levels = [-1 for _ in self.adjacency]
+        levels[source] = 0
+        
+        queue = [source]
+        for node in queue:
+            for edge in self.adjacency[node]:
+                if self.capacities[edge] > 0 and levels[self.heads[edge]] < 0:
+                    levels[self.heads[edge]] = levels[node] + 1
+                    queue.append(self.heads[edge])
+        
+        return levels if levels[sink] >= 0 else None
+    
+    def _augment(self, node: int, sink: int, limit: int, levels: list[int], nextEdges: list[int]):
+        if node == sink:
+            return limit
+        
+        while nextEdges[node] < len(self.adjacency[node]):
+            edge = self.adjacency[node][nextEdges[node]]
+            head = self.heads[edge]
+            
+            if self.capacities[edge] > 0 and levels[head] == levels[node] + 1:
+                pushed = self._augment(head, sink, min(limit, self.capacities[edge]), levels, nextEdges)
+                if pushed:
+                    self.capacities[edge] -= pushed
+                    self.capacities[edge ^ 1] += pushed
+                    return pushed
+            
+            nextEdges[node] += 1
+        
+        return 0
+    
+    def maxFlow(self, source, sink):
+        # Dinic's algorithm: blocking flows over BFS level graphs
+        if source not in self.nodes or sink not in self.nodes:
+            return 0
+        
+        source = self.nodes[source]
+        sink = self.nodes[sink]
+        
+        flow = 0
+        while True:
+            levels = self._levels(source, sink)
+            if levels is None:
+                break
+            
+            nextEdges = [0 for _ in self.adjacency]
+            
+            pushed = self._augment(source, sink, math.inf, levels, nextEdges)
+            while pushed:
+                flow += pushed
+                pushed = self._augment(source, sink, math.inf, levels, nextEdges)
+        
+        return flow
@@ -0,0 +1,160 @@
+from middle.objects import *
+
+BREAK_SLOT = "&break"
+
+class SchoolGrid:
+    def __init__(self, schoolDict: dict[Class, Timetable], rng: random.Random | None = None) -> None:
+        self.random = rng if rng is not None else random.Random()
+        
+        self.timetables = list(schoolDict.values())
+        
+        # Per class: the subjects it needs this week, and the allowed rows of any locked subject
+        self.subjects: list[dict[str, Subject]] = []
+        self.lockedRows: list[dict[str, range]] = []
+        
+        # Per class: day -> one entry per period, a subject ID, None for a free period or BREAK_SLOT
+        self.grids: list[dict[str, list[str | None]]] = []
+        self.fixed: list[set[tuple[str, int]]] = []
+        self.movable: list[list[tuple[str, int]]] = []
+        self.lockedBlocks: list[dict[tuple[str, int], list[int]]] = []
+        self.breakPeriods: list[dict[str, int]] = []
+        
+        for timetable in self.timetables:
+            subjects = {subject.id: subject for subject in timetable.cls.subjects if subject.id not in (timetable.freePeriodID, timetable.breakPeriodID) and subject.teacher is not None}
+            
+            lockedRows = {}
+            for subject in list(subjects.values()) + timetable.remainderContent:
+                if subject.lockedPeriod and subject.id in subjects:
+                    lockedRows[subject.id] = range(subject.lockedPeriod[0], subject.lockedPeriod[0] + subject.lockedPeriod[1])
+            
+            grid = {}
+            fixed = set()
+            lockedBlocks = {}
+            breakPeriods = {}
+            for day, periods, breakPeriod in timetable.weekInfo:
+                breakPeriods[day] = breakPeriod
+                
+                dayGrid: list[str | None] = [None for _ in range(periods)]
+                
+                index = 0
+                for subject in timetable.table.get(day, []):
+                    for offset in range(subject.total):
+                        if index + offset >= periods:
+                            break
+                        
+                        if subject.id == timetable.breakPeriodID:
+                            dayGrid[index + offset] = BREAK_SLOT
+                        elif subject.id in subjects:
+                            dayGrid[index + offset] = subject.id
+                        
+                        if subject.lockedPeriod:
+                            fixed.add((day, index + offset))
+                            lockedBlocks[day, index + offset] = subject.lockedPeriod
+                    index += subject.total
+                
+                if 0 < breakPeriod <= periods:
+                    dayGrid[breakPeriod - 1] = BREAK_SLOT
+                
+                for index, value in enumerate(dayGrid):
+                    if value == BREAK_SLOT:
+                        fixed.add((day, index))
+                
+                grid[day] = dayGrid
+            
+            self.subjects.append(subjects)
+            self.lockedRows.append(lockedRows)
+            self.grids.append(grid)
+            self.fixed.append(fixed)
+            self.movable.append([(day, index) for day, dayGrid in grid.items() for index in range(len(dayGrid)) if (day, index) not in fixed])
+            self.lockedBlocks.append(lockedBlocks)
+            self.breakPeriods.append(breakPeriods)
+        
+        self.dayPeriods: dict[str, int] = {}
+        for grid in self.grids:
+            for day, dayGrid in grid.items():
+                self.dayPeriods[day] = max(self.dayPeriods.get(day, 0), len(dayGrid))
+        
+        self.teacherCounts: dict[tuple[str, str, int], int] = {}
+        self.placed: list[dict[str, int]] = [{subjectID: 0 for subjectID in subjects} for subjects in self.subjects]
+        
+        for classIndex, grid in enumerate(self.grids):
+            for day, dayGrid in grid.items():
+                for index, value in enumerate(dayGrid):
+                    if value is not None and value != BREAK_SLOT:
+                        self._count(classIndex, day, index, value, 1)
+        
+        self.bestGrids = self._snapshot()
+    
+    def _count(self, classIndex: int, day: str, index: int, subjectID: str, amount: int):
+        key = (self.subjects[classIndex][subjectID].teacher.id, day, index + 1)
+        self.teacherCounts[key] = self.teacherCounts.get(key, 0) + amount
+        self.placed[classIndex][subjectID] += amount
+    
+    def _set(self, classIndex: int, day: str, index: int, value: str | None):
+        previous = self.grids[classIndex][day][index]
+        
+        if previous is not None:
+            self._count(classIndex, day, index, previous, -1)
+        if value is not None:
+            self._count(classIndex, day, index, value, 1)
+        
+        self.grids[classIndex][day][index] = value
+    
+    def _allowed(self, classIndex: int, index: int, value: str | None):
+        return value is None or value not in self.lockedRows[classIndex] or index in self.lockedRows[classIndex][value]
+    
+    def _proposeSwap(self, classIndex: int):
+        movable = self.movable[classIndex]
+        
+        if len(movable) < 2:
+            return None
+        
+        (day, index), (otherDay, otherIndex) = self.random.sample(movable, 2)
+        value = self.grids[classIndex][day][index]
+        otherValue = self.grids[classIndex][otherDay][otherIndex]
+        
+        if value == otherValue or not self._allowed(classIndex, otherIndex, value) or not self._allowed(classIndex, index, otherValue):
+            return None
+        
+        return [(day, index, otherValue), (otherDay, otherIndex, value)]
+    
+    def shapeCost(self, classIndex: int, day: str):
+        amounts: dict[str, int] = {}
+        runs: dict[str, int] = {}
+        
+        previous = None
+        for value in self.grids[classIndex][day]:
+            if value is not None and value != BREAK_SLOT:
+                amounts[value] = amounts.get(value, 0) + 1
+                if value != previous:
+                    runs[value] = runs.get(value, 0) + 1
+            previous = value
+        
+        # A subject should sit in one block a day and never exceed its daily total
+        return sum(max(amount - self.subjects[classIndex][subjectID].TOTAL, 0) + runs[subjectID] - 1 for subjectID, amount in amounts.items())
+    
+    def _snapshot(self):
+        return [{day: list(dayGrid) for day, dayGrid in grid.items()} for grid in self.grids]
+    
+    def apply(self):
+        for classIndex, timetable in enumerate(self.timetables):
+            subjects = [subject.copy() for subject in self.subjects[classIndex].values()]
+            subjectsByID = {subject.id: subject for subject in subjects}
+            
+            slots = {}
+            for day, dayGrid in self.bestGrids[classIndex].items():
+                slots[day] = [subjectsByID[value] if value is not None and value != BREAK_SLOT else None for value in dayGrid]
+            
+            timetable.fillFromSlots(slots, subjects)
+            
+            # fillFromSlots rebuilds every block, so carry the locks over to the blocks that hold them
+            for day, subjects in timetable.table.items():
+                index = 0
+                for subject in subjects:
+                    for offset in range(subject.total):
+                        if (day, index + offset) in self.lockedBlocks[classIndex] and subject.id in subjectsByID:
+                            subject.lockedPeriod = self.lockedBlocks[classIndex][day, index + offset]
+                    index += subject.total
+            
+            timetable._foundPerfectTimeTable = not timetable.remainderContent
+            timetable._publish()
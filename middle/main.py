@@ -2,6 +2,14 @@
 #     from objects import *
 # else:
 from middle.objects import *
+from middle.occupancy import *
+from middle.solver import *
+from middle.scheduling import *
+from middle.repair import *
+from middle.optimizer import *
+from middle.feasibility import *
+from middle.flow import *
+from middle.schema import *
 
 PotentialOptionType = Union[
     dict[str,
@@ -29,79 +37,122 @@ PotentialOptionType = Union[
 
 ProjectType = dict[str, PotentialOptionType]
 
+GENERATION_ENGINES: dict[str, Callable[[Timetable], None]] = {
+    "greedy": Timetable.generate,
+    "backtracking": solveTimetable
+}
+
 class School:
-    def __init__(self, project: ProjectType):
+    def __init__(self, project: ProjectType, seed: int | str | None = None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self._classRandoms: dict[str, random.Random] = {}
+        
         self.classes: dict[str, Class] = {}
         self.teachers: dict[str, Teacher] = {}
         self.schoolDict: dict[Class, Timetable] = {}
+        self.occupancy = TeacherOccupancy()
+        
+        self.defaultGenerationBudget: tuple[int | None, float | None] = (30, None)
+        self.generationBudgets: dict[str, tuple[int | None, float | None]] = {}
+        self.generationEngine = "greedy"
+        self.generationMode = "sequential"
+        # Multi-start sends this to worker processes, so it has to pickle: a module-level function, not a lambda or closure
+        self.classOrdering: Callable[[list[Class]], list[Class]] = mostConstrainedFirst
+        self.repairBudget: tuple[int | None, float | None] | None = None
+        
+        self.feasibilityReport = FeasibilityReport()
         
         self.setProjectData(project)
     
     def _nullCheck(self, value, null_replacement):
         return null_replacement if value is None else value
     
-    def _getSubjects(self, classOptions: dict[str, list[str]], mappings: dict[str, dict[str, list | dict[str, list]]]):
+    def _getSubjects(self):
         subjects = {}
         
-        for subjectID, (subjectName, subjectInfo) in mappings.items():
-            subjectTimingMappings = subjectInfo.pop("&timings")
-            subjectClassesMappings = subjectInfo.pop("&classes", {})
-            
-            subjects[subjectID] = [subjectName, {}]
+        # Periods a week each teacher has been given so far, over every subject
+        teacherLoad: dict[str, int] = {}
+        randomTeachers: list[tuple[str, str, list[str], list[tuple[str, str, int]]]] = []
+        
+        for subjectID, mapping in self.schema.subjectTeacherMapping.items():
+            subjects[subjectID] = [mapping.name, {}]
             
-            randomTeachers = []
-            for teacherID, (teacherName, levelIndexesMapping) in subjectInfo.items():
-                for strClassIndex, (maxRandomClassesAmt, options) in levelIndexesMapping.items():
-                    teachersMapping = {}
+            levelRandomTeachers: dict[int, list[tuple[str, str, int]]] = {}
+            for teacherID, teacher in mapping.teachers.items():
+                for levelIndex, teacherLevel in teacher.levels.items():
+                    perDay, perWeek = mapping.timings[levelIndex]
+                    teachersMapping = subjects[subjectID][1].setdefault(str(levelIndex), [perDay, perWeek, {}])[2]
                     
-                    timings = subjectTimingMappings[strClassIndex]
-                    if options:
-                        for optionID in options:
-                            teachersMapping[optionID] = [[teacherID, teacherName], []]
-                        
-                        subjects[subjectID][1][strClassIndex] = [timings[0], timings[1], teachersMapping]
+                    if teacherLevel.classIDs:
+                        for optionID in teacherLevel.classIDs:
+                            teachersMapping[optionID] = [[teacherID, teacher.name], []]
+                            teacherLoad[teacherID] = teacherLoad.get(teacherID, 0) + perWeek
                     else:
-                        randomTeachers.append([strClassIndex, [teacherID, teacherName], timings, maxRandomClassesAmt])
+                        levelRandomTeachers.setdefault(levelIndex, []).append((teacherID, teacher.name, teacherLevel.maxRandomAmt))
+            
+            for levelIndex, teachers in levelRandomTeachers.items():
+                randomTeachers.append((subjectID, str(levelIndex), mapping.classes.get(levelIndex, list(self.schema.levels[levelIndex].classes)), teachers))
+        
+        # Teachers without listed classes are handed the classes left over once every listed class is known. A teacher's
+        # next class costs their load after taking it, which only grows, so always giving the next class to the cheapest
+        # teacher spreads classes as evenly as any assignment can
+        for subjectID, strClassIndex, options, teachers in randomTeachers:
+            perWeek = subjects[subjectID][1][strClassIndex][1]
+            teachersMapping = subjects[subjectID][1][strClassIndex][2]
+            
+            classesLeft = [teacherInfo[2] for teacherInfo in teachers]
+            heap = [(teacherLoad.get(teacherID, 0) + perWeek, teacherIndex) for teacherIndex, (teacherID, _, maxClasses) in enumerate(teachers) if maxClasses > 0]
+            heapq.heapify(heap)
             
-            for strClassIndex, t_data, timings, maxClasses in randomTeachers:
-                classAmt = 0
+            for option in options:
+                if option in teachersMapping:
+                    continue
                 
-                options = subjectClassesMappings.get(strClassIndex, classOptions[int(strClassIndex)])
-                if random.choice([True, False]):
-                    random.shuffle(options)
+                if not heap:
+                    break
                 
-                subjects[subjectID][1][strClassIndex] = subjects[subjectID][1].get(strClassIndex, [timings[0], timings[1], {}])
+                _, teacherIndex = heapq.heappop(heap)
+                teacherID, teacherName, _ = teachers[teacherIndex]
                 
-                for option in options:
-                    if classAmt >= maxClasses:
-                        break
-                    
-                    if option not in subjects[subjectID][1][strClassIndex][2]:
-                        subjects[subjectID][1][strClassIndex][2][option] = [t_data, []]
-                        classAmt += 1
+                teachersMapping[option] = [[teacherID, teacherName], []]
+                teacherLoad[teacherID] = teacherLoad.get(teacherID, 0) + perWeek
+                
+                classesLeft[teacherIndex] -= 1
+                if classesLeft[teacherIndex] > 0:
+                    heapq.heappush(heap, (teacherLoad[teacherID] + perWeek, teacherIndex))
         
         return subjects
     
-    def findClashes(self, subject: Subject, day: str, period: int, cls: Class):
-        clashes: list[tuple[Subject, Class]] = []
+    def getClassRandom(self, cls: Class):
+        # Every class draws from its own stream so one class's generation never shifts another's
+        if cls.uniqueID not in self._classRandoms:
+            self._classRandoms[cls.uniqueID] = random.Random(f"{self.seed}:{cls.uniqueID}" if self.seed is not None else None)
         
-        for ttCls, timetable in self.schoolDict.items():
-            subjPeriod = 1
-            for subj in timetable.table[day]:
-                if cls.uniqueID != ttCls.uniqueID and period <= subjPeriod <= period + subject.total - 1 and subject.teacher is not None and subj.teacher is not None and subject.teacher.id == subj.teacher.id:
-                    clashes.append([subj, ttCls])
-                subjPeriod += subj.total
-        
-        return clashes
+        return self._classRandoms[cls.uniqueID]
     
-    def getClashes(self):
+    def refreshOccupancy(self):
+        self.occupancy.rebuild(self.schoolDict)
+    
+    def findClashes(self, subject: Subject, day: str, period: int, cls: Class):
+        return self.occupancy.findClashes(subject, day, period, cls)
+    
+    def getClashes(self, vectorized: bool = False):
+        if vectorized:
+            tensor = OccupancyTensor()
+            tensor.build(self.schoolDict)
+            
+            return tensor.getClashes()
+        
         clashes = {}
         
+        self.refreshOccupancy()
+        
         for cls, timetable in self.schoolDict.items():
             for day, subjects in timetable.table.items():
                 for subjectIndex, subject in enumerate(subjects):
                     if subject.teacher is not None:
-                        period = sum([subj.total for subj in subjects[:subjectIndex]]) + 1
+                        period = subjects.startOf(subjectIndex)
                         clash = self.findClashes(subject, day, period, cls)
                         if clash:
                             if clashes.get(subject) is None:
@@ -110,52 +161,304 @@ class School:
         
         return clashes
     
-    def generateTimetable(self, cls: Class):
-        cls.timetable.__init__(cls, cls.timetable.subjects, cls.timetable.periodsPerDay, cls.timetable.breakTimePeriods, self.schoolDict)
+    def getClashPairs(self):
+        tensor = OccupancyTensor()
+        tensor.build(self.schoolDict)
+        
+        return tensor.clashPairs()
+    
+    def setGenerationBudget(self, maxTries: int | None = 30, timeLimit: float | None = None, cls: Class | None = None):
+        if cls is None:
+            self.defaultGenerationBudget = (maxTries, timeLimit)
+        else:
+            self.generationBudgets[cls.uniqueID] = (maxTries, timeLimit)
+    
+    def getGenerationStopReasons(self):
+        return {cls.uniqueID: timetable.stopReason for cls, timetable in self.schoolDict.items()}
+    
+    def checkFeasibility(self):
+        self.feasibilityReport = checkFeasibility(list(self.classes.values()))
+        
+        return self.feasibilityReport
+    
+    def explainTimetable(self, cls: Class):
+        self.refreshOccupancy()
+        
+        return explainClass(cls, self.occupancy)
+    
+    def _prepareTimetable(self, cls: Class):
+        cls.timetable.__init__(cls, [subject.copy() for subject in cls.subjects], cls.timetable.periodsPerDay, cls.timetable.breakTimePeriods, self.schoolDict)
+        
+        maxTries, timeLimit = self.generationBudgets.get(cls.uniqueID, self.defaultGenerationBudget)
+        
+        # Retrying cannot get rid of the remainders of a class that is impossible on paper
+        if cls.uniqueID in self.feasibilityReport.impossibleClasses:
+            maxTries = 0
+        
+        cls.timetable.setBudget(maxTries, timeLimit)
         cls.timetable.addFreePeriods()
-        cls.timetable.generate()
     
-    def generateNewSchoolTimetables(self):
+    def _flagInfeasible(self, cls: Class):
+        if cls.uniqueID in self.feasibilityReport.impossibleClasses:
+            cls.timetable.stopReason = STOP_INFEASIBLE
+    
+    def _generateTimetable(self, cls: Class):
+        self._prepareTimetable(cls)
+        GENERATION_ENGINES[self.generationEngine](cls.timetable)
+        self._flagInfeasible(cls)
+    
+    def _getWarmStartPlacements(self, cls: Class):
+        dayIndexes = {day: dayIndex for dayIndex, day in enumerate(cls.weekdays)}
+        placements: dict[tuple[int, int], str] = {}
+        
+        for day, subjects in cls.timetable.table.items():
+            if day not in dayIndexes:
+                continue
+            
+            period = 1
+            for subject in subjects:
+                if subject.teacher is not None:
+                    for subjectPeriod in range(period, period + subject.total):
+                        placements[dayIndexes[day], subjectPeriod] = subject.id
+                period += subject.total
+        
+        return placements
+    
+    def _warmStartTimetable(self, cls: Class):
+        placements = self._getWarmStartPlacements(cls)
+        
+        # The solver drops every placement that now clashes or breaks the class's settings and fills in the rest
+        self._prepareTimetable(cls)
+        solveTimetable(cls.timetable, placements)
+        self._flagInfeasible(cls)
+    
+    def generateTimetable(self, cls: Class, warmStart: bool = False):
+        self.refreshOccupancy()
+        self.checkFeasibility()
+        
+        if warmStart:
+            self._warmStartTimetable(cls)
+        else:
+            self._generateTimetable(cls)
+    
+    def generateNewSchoolTimetables(self, attempts: int = 1, workers: int | None = None, warmStart: bool = False):
+        if attempts > 1:
+            self._generateBestOfSchoolTimetables(attempts, workers, warmStart)
+            return
+        
+        self.refreshOccupancy()
+        self.checkFeasibility()
+        
+        self._generateClasses(self.getGenerationOrder(), warmStart)
+        
+        if self.repairBudget is not None:
+            self.repairTimetables(*self.repairBudget)
+    
+    def _generateClasses(self, classes: list[Class], warmStart: bool = False):
+        if warmStart:
+            for cls in classes:
+                self._warmStartTimetable(cls)
+        elif self.generationMode == "simultaneous":
+            for cls in classes:
+                self.occupancy.removeClass(cls)
+                self._prepareTimetable(cls)
+            
+            WholeSchoolScheduler([cls.timetable for cls in classes], self.occupancy).schedule()
+            
+            for cls in classes:
+                self._flagInfeasible(cls)
+        else:
+            for cls in classes:
+                self._generateTimetable(cls)
+    
+    def getClassSignatures(self):
+        signatures = {}
+        
         for _, cls in self.classes.items():
-            self.generateTimetable(cls)
+            subjects = sorted((subject.id, subject.teacher.id if subject.teacher is not None else "", subject.TOTAL, subject.PERWEEK) for subject in cls.subjects)
+            signatures[cls.uniqueID] = (tuple(cls.weekdays), tuple(cls.periodsPerDay), tuple(cls.breakTimePeriods), tuple(subjects))
+        
+        return signatures
+    
+    def getChangedClasses(self, previousSignatures: dict[str, tuple]):
+        return {classID for classID, signature in self.getClassSignatures().items() if previousSignatures.get(classID) != signature}
+    
+    def getTeacherClasses(self):
+        teacherClasses: dict[str, set[str]] = {}
+        
+        for _, cls in self.classes.items():
+            for subject in cls.subjects:
+                if subject.teacher is not None:
+                    teacherClasses.setdefault(subject.teacher.id, set()).add(cls.uniqueID)
+        
+        return teacherClasses
+    
+    def getAffectedClasses(self, classIDs: set[str]):
+        teacherClasses = self.getTeacherClasses()
+        affected = {classID for classID in classIDs if classID in self.classes}
+        
+        # A changed class can only push lessons around for the classes it shares a teacher with
+        for classID in list(affected):
+            for subject in self.classes[classID].subjects:
+                if subject.teacher is not None:
+                    affected |= teacherClasses[subject.teacher.id]
+        
+        return affected
+    
+    def regenerateClasses(self, classIDs: set[str], warmStart: bool = False):
+        classIDs = {classID for classID in classIDs if classID in self.classes}
+        if not classIDs:
+            return
+        
+        # Untouched classes keep their tables and stay in the occupancy index as fixed constraints
+        self.schoolDict.clear()
+        for _, cls in self.classes.items():
+            if cls.uniqueID not in classIDs:
+                self.schoolDict[cls] = cls.timetable
+        
+        self.refreshOccupancy()
+        self.checkFeasibility()
+        
+        self._generateClasses([cls for cls in self.getGenerationOrder() if cls.uniqueID in classIDs], warmStart)
+    
+    def repairTimetables(self, maxIterations: int | None = 20000, timeLimit: float | None = None):
+        repair = AnnealingRepair({cls: cls.timetable for cls in self.classes.values()}, maxIterations, timeLimit, rng=self.random)
+        repair.repair()
+        repair.apply()
+        
+        return repair.bestCost
+    
+    def optimizeTimetables(self, maxIterations: int | None = 500, timeLimit: float | None = None, terms: list[ScoringTerm] | None = None):
+        optimizer = TabuOptimizer({cls: cls.timetable for cls in self.classes.values()}, terms, maxIterations, timeLimit, rng=self.random)
+        optimizer.optimize()
+        optimizer.apply()
+        
+        return optimizer.bestCost
+    
+    def getTimetableScores(self, terms: list[ScoringTerm] | None = None):
+        return TabuOptimizer({cls: cls.timetable for cls in self.classes.values()}, terms).getScores()
+    
+    def getGenerationOrder(self):
+        return self.classOrdering(list(self.classes.values()))
+    
+    def getGenerationSettings(self):
+        return {
+            "engine": self.generationEngine,
+            "mode": self.generationMode,
+            "classOrdering": self.classOrdering,
+            "repairBudget": self.repairBudget,
+            "defaultBudget": self.defaultGenerationBudget,
+            "budgets": self.generationBudgets
+        }
+    
+    def setGenerationSettings(self, settings: dict[str, Any]):
+        self.generationEngine = settings["engine"]
+        self.generationMode = settings["mode"]
+        self.classOrdering = settings["classOrdering"]
+        self.repairBudget = settings["repairBudget"]
+        self.defaultGenerationBudget = settings["defaultBudget"]
+        self.generationBudgets = dict(settings["budgets"])
+    
+    def _generateBestOfSchoolTimetables(self, attempts: int, workers: int | None, warmStart: bool = False):
+        settings = self.getGenerationSettings()
+        
+        # Caught here, since a hook that cannot pickle would otherwise only fail inside the pool
+        try:
+            pickle.dumps(settings["classOrdering"])
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(f"classOrdering {self.classOrdering!r} cannot be sent to generation workers, it has to be a module-level function") from e
+        
+        self.checkFeasibility()
+        
+        # Warm started attempts all begin from the current tables, which the workers cannot see otherwise
+        warmStartDump = self.dumpTimetables() if warmStart else None
+        seeds = [self.random.randrange(2 ** 32) for _ in range(attempts)]
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initGenerationWorker, initargs=(self.project, settings, warmStartDump)) as executor:
+            results = list(executor.map(_generateSchoolAttempt, seeds))
+        
+        _, bestDump = min(results, key=lambda result: result[0])
+        
+        self.loadTimetablesDump(bestDump)
+    
+    def getGenerationScore(self):
+        remainderAmt = 0
+        for _, timetable in self.schoolDict.items():
+            remainderAmt += sum(subject.perWeek for subject in timetable.remainderContent if subject.teacher is not None)
+        
+        return remainderAmt, len(self.getClashPairs())
+    
+    def dumpTimetables(self):
+        dump = {}
+        
+        for _, cls in self.classes.items():
+            timetable = cls.timetable
+            
+            grid = timetable.toSlotGrid()
+            table = (grid.tobytes(), grid.days, grid.lengths, grid.palette)
+            remainders = [(s.id, s.name, s.teacher.id if s.teacher is not None else None, s.TOTAL, s.PERWEEK, s.total, s.perWeek, s.lockedPeriod) for s in timetable.remainderContent]
+            
+            dump[cls.uniqueID] = (table, remainders, timetable._perfectTimetableCounter, timetable._foundPerfectTimeTable, timetable.stopReason)
+        
+        return dump
+    
+    def loadTimetablesDump(self, dump: dict[str, tuple]):
+        def makeSubject(subjectID: str, subjectName: str, teacherID: str | None, TOTAL: int, PERWEEK: int, total: int, perWeek: int, lockedPeriod: list[int] | None):
+            subject = Subject(subjectID, subjectName, TOTAL, PERWEEK, self.teachers.get(teacherID) if teacherID is not None else None)
+            
+            # Leftovers keep their own totals and lock, which repair and the optimizer read back
+            subject.total = total
+            subject.perWeek = perWeek
+            subject.lockedPeriod = list(lockedPeriod) if lockedPeriod else None
+            
+            return subject
+        
+        for classUniqueID, (table, remainders, perfectTimetableCounter, foundPerfectTimeTable, stopReason) in dump.items():
+            timetable = self.classes[classUniqueID].timetable
+            
+            timetable.setFromSlotGrid(SlotGrid.frombytes(*table))
+            timetable.remainderContent = [makeSubject(*subjectInfo) for subjectInfo in remainders]
+            timetable.subjects = [subject.copy() for subject in timetable.remainderContent]
+            timetable._perfectTimetableCounter = perfectTimetableCounter
+            timetable._foundPerfectTimeTable = foundPerfectTimeTable
+            timetable.stopReason = stopReason
+        
+        self.schoolDict.clear()
+        for _, cls in self.classes.items():
+            if cls.uniqueID in dump:
+                self.schoolDict[cls] = cls.timetable
+        
+        self.refreshOccupancy()
     
     def setProjectData(self, project: ProjectType):
         self.project = project
+        self.schema = ProjectSchema.fromProject(project)
     
     def setSchoolInfoFromProjectDict(self):
         self.classes = {}
         self.teachers = {}
         self.schoolDict = {}
+        self.occupancy.clear()
         
-        classIDNameMapping = {}
-        for _, levelInfo in self.project['levels']:
-            for classID, (className, _) in levelInfo.items():
-                classIDNameMapping[classID] = className
-        
-        periods = [{_id: p for _id, (_, (p, _, _)) in classInfo.items()} for _, classInfo in self.project['levels']]
-        breakperiods = [{_id: b for _id, (_, (_, b, _))  in classInfo.items()} for _, classInfo in self.project['levels']]
-        weekdays = [{_id: w for _id, (_, (_, _, w))  in classInfo.items()} for _, classInfo in self.project['levels']]
-        levelNames = [name for name, _ in self.project['levels']]
-        classOptions = [[_id for _id, _ in classInfo.items()] for _, classInfo in self.project['levels']]
+        if self.schema.subjects is None:
+            self.project["subjects"] = self._getSubjects()
+            self.schema.setSubjects(parseSubjects(self.project["subjects"], self.schema.levels))
         
-        subjects = self.project.get("subjects")
+        levelNames = [level.name for level in self.schema.levels]
         
-        if subjects is None:
-            subjects = self.project["subjects"] = self._getSubjects(classOptions, self.project["subjectTeacherMapping"])
-        
-        for classIndex, classIDs in enumerate(classOptions):
-            for classID in classIDs:
-                cls = Class(classIndex, classID, classIDNameMapping[classID], [], periods[classIndex][classID], levelNames, self, self.schoolDict, self.teachers, weekdays[classIndex][classID], breakperiods[classIndex][classID])
+        for level in self.schema.levels:
+            for classID, classInfo in level.classes.items():
+                cls = Class(level.index, classID, classInfo.name, [], classInfo.periodsPerDay, levelNames, self, self.schoolDict, self.teachers, classInfo.weekdays, classInfo.breakPeriods)
                 self.classes[cls.uniqueID] = cls
         
-        for subjectID, (subjectName, subjectInfo) in subjects.items():
-            for classIndex, (perDay, perWeek, classTeacherMapping) in subjectInfo.items():
-                for classID, ((teacherID, teachersName), _) in classTeacherMapping.items():
-                    teacher = self.teachers[teacherID] = self.teachers.get(teacherID, Teacher(teacherID, teachersName, {}))
+        for subjectID, subjectInfo in self.schema.subjects.items():
+            for levelIndex, levelInfo in subjectInfo.levels.items():
+                for classID, placement in levelInfo.classes.items():
+                    teacher = self.teachers[placement.teacherID] = self.teachers.get(placement.teacherID, Teacher(placement.teacherID, placement.teacherName, {}))
                     
-                    subj = Subject(subjectID, subjectName, perDay, perWeek, teacher)
+                    subj = Subject(subjectID, subjectInfo.name, levelInfo.perDay, levelInfo.perWeek, teacher)
                     
-                    cls = self.classes[Class.getUniqueID(int(classIndex), classID)]
+                    cls = self.classes[Class.getUniqueID(levelIndex, classID)]
                     
                     teacher.subjects[subj] = cls
                     
@@ -176,111 +479,108 @@ class School:
             else:
                 classLevels.append([cls.namingConvention[cls.index], {cls.classID: [cls.className, [cls.periodsPerDay, cls.breakTimePeriods, cls.weekdays]]}])
         
+        # Class IDs are gathered in dicts used as ordered sets and turned into lists once at the end
         subjectTeacherMapping = {}
         for t_id, teacher in self.teachers.items():
             for subject, cls in teacher.subjects.items():
-                if subjectTeacherMapping.get(subject.id) is None:
-                    subjectTeacherMapping[subject.id] = [subject.name, {"&timings": {}, "&classes": {}}]
-                
-                maxRandomAmt = self.project["subjectTeacherMapping"][subject.id][1][t_id][1][str(cls.index)][0]
-                
-                if subjectTeacherMapping[subject.id][1].get(t_id) is None:
-                    subjectTeacherMapping[subject.id][1][t_id] = [teacher.name, {str(cls.index): [maxRandomAmt, [cls.classID]]}]
-                else:
-                    if subjectTeacherMapping[subject.id][1][t_id][1].get(str(cls.index)) is None:
-                        subjectTeacherMapping[subject.id][1][t_id][1][str(cls.index)] = [maxRandomAmt, [cls.classID]]
-                    else:
-                        subjectTeacherMapping[subject.id][1][t_id][1][str(cls.index)][1].append(cls.classID)
-                
-                subjectTeacherMapping[subject.id][1][t_id][1][str(cls.index)][1] = list(set(subjectTeacherMapping[subject.id][1][t_id][1][str(cls.index)][1]))
-                
-                if subjectTeacherMapping[subject.id][1]["&classes"].get(str(cls.index)) is None:
-                    subjectTeacherMapping[subject.id][1]["&classes"][str(cls.index)] = [cls.classID]
-                else:
-                    subjectTeacherMapping[subject.id][1]["&classes"][str(cls.index)].append(cls.classID)
+                level = str(cls.index)
+                subjectInfo = subjectTeacherMapping.setdefault(subject.id, [subject.name, {"&timings": {}, "&classes": {}}])[1]
                 
-                subjectTeacherMapping[subject.id][1]["&classes"][str(cls.index)] = list(set(subjectTeacherMapping[subject.id][1]["&classes"][str(cls.index)]))
+                teacherLevels = subjectInfo.setdefault(t_id, [teacher.name, {}])[1]
+                if level not in teacherLevels:
+                    teacherLevels[level] = [self.schema.getTeacherLevel(subject.id, t_id, cls.index).maxRandomAmt, {}]
+                teacherLevels[level][1][cls.classID] = None
                 
-                if subjectTeacherMapping[subject.id][1]["&timings"].get(str(cls.index)) is None:
-                    subjectTeacherMapping[subject.id][1]["&timings"][str(cls.index)] = [subject.TOTAL, subject.PERWEEK]
+                subjectInfo["&classes"].setdefault(level, {})[cls.classID] = None
+                subjectInfo["&timings"].setdefault(level, [subject.TOTAL, subject.PERWEEK])
         
         for _, (_, subjectInfo) in subjectTeacherMapping.items():
-            for index, validClasses in subjectInfo["&classes"].copy().items():
+            for key, info in subjectInfo.items():
+                if not key.startswith("&"):
+                    for levelInfo in info[1].values():
+                        levelInfo[1] = list(levelInfo[1])
+            
+            for index, validClasses in list(subjectInfo["&classes"].items()):
                 if len(validClasses) == len(classLevels[int(index)][1]):
                     subjectInfo["&classes"].pop(index)
+                else:
+                    subjectInfo["&classes"][index] = list(validClasses)
             
             if not subjectInfo["&classes"]:
                 subjectInfo.pop("&classes")
         
         subjects = {}
         for _, cls in self.classes.items():
+            level = str(cls.index)
+            
             for subject in cls.subjects:
                 if subject.id not in (cls.timetable.freePeriodID, cls.timetable.breakPeriodID):
-                    subjectLevelClassInfo = [(subject.teacher.id, subject.teacher.name), self.project["subjects"][subject.id][1][str(cls.index)][2][cls.classID][1]]
-                    subjectLevelInfo = [subject.TOTAL, subject.PERWEEK, {cls.classID: subjectLevelClassInfo}]
+                    subjectLevels = subjects.setdefault(subject.id, [subject.name, {}])[1]
+                    subjectLevelInfo = subjectLevels.setdefault(level, [subject.TOTAL, subject.PERWEEK, {}])
                     
-                    if subject.id not in subjects:
-                        subjects[subject.id] = [subject.name, {str(cls.index): subjectLevelInfo}]
-                    else:
-                        if str(cls.index) not in subjects[subject.id][1]:
-                            subjects[subject.id][1][str(cls.index)] = subjectLevelInfo
-                        else:
-                            subjects[subject.id][1][str(cls.index)][2][cls.classID] = subjectLevelClassInfo
+                    subjectLevelInfo[2][cls.classID] = [(subject.teacher.id, subject.teacher.name), self.schema.getPlacement(subject.id, cls.index, cls.classID).coords]
         
         self.project.update({
             "levels": classLevels, 
             "subjectTeacherMapping": subjectTeacherMapping,
             "subjects": subjects
         })
+        self.setProjectData(self.project)
     
     def setTimetableFromProjectDict(self):
+        grids: dict[str, SlotGrid] = {}
+        
         for _, cls in self.classes.items():
             cls.timetable.reset()
-            for dayIndex, (day, _) in enumerate(cls.timetable.table.items()):
-                free1 = [Subject(cls.timetable.freePeriodID, "Free", 1, 1, None) for _ in range(cls.timetable.breakTimePeriods[dayIndex] - 1)]
-                break_t = [Subject(cls.timetable.breakPeriodID, "Break", 1, 1, None)]
-                free2 = [Subject(cls.timetable.freePeriodID, "Free", 1, 1, None) for _ in range(cls.timetable.periodsPerDay[dayIndex] - cls.timetable.breakTimePeriods[dayIndex])]
-                
-                cls.timetable.table[day] = list(flatten([free1, break_t, free2]))
-                
-                for s in cls.timetable.table[day]:
-                    s.perWeek = 0
-        
-        for subjectID, (subjectName, subjectInfo) in self.project["subjects"].items():
-            for _, (perDay, perWeek, classTeacherCoordsMapping) in subjectInfo.items():
-                for classID, ((teacherID, _), coords) in classTeacherCoordsMapping.items():
-                    for _, cls in self.classes.items():
-                        teacher = next((teacher for teacher in cls.teachers if teacher.id == teacherID), None)
-                        if cls.classID == classID and teacher is not None:
-                            for (dayIndex, period), (coordTotal, coordPerWeek), remainderAmount in coords:
-                                subjectInsert = Subject(subjectID, subjectName, coordTotal, coordPerWeek, teacher)
-                                
-                                subjectInsert.TOTAL = perDay
-                                subjectInsert.PERWEEK = perWeek
-                                
-                                if remainderAmount:
-                                    cls.timetable.remainderContent.append(Subject(subjectID, subjectName, coordTotal, remainderAmount, teacher))
-                                
-                                daysOfTheWeek = list(cls.timetable.table.keys())
-                                cls.timetable.table[daysOfTheWeek[dayIndex]][period : period + subjectInsert.total] = [subjectInsert for _ in range(subjectInsert.total)]
-                            break
+            
+            grid = grids[cls.uniqueID] = SlotGrid(list(cls.timetable.table.keys()), cls.timetable.periodsPerDay[:len(cls.timetable.table)], subjects=cls.subjects)
+            for dayIndex, breakPeriod in enumerate(cls.timetable.breakTimePeriods[:len(grid.days)]):
+                if 0 < breakPeriod <= grid.lengths[dayIndex]:
+                    grid.codes[dayIndex, breakPeriod - 1] = SlotGrid.BREAK
         
+        classTeachers: dict[tuple[str, str], Teacher] = {}
         for _, cls in self.classes.items():
-            for dayIndex, (day, subjects) in enumerate(cls.timetable.table.copy().items()):
-                newSubjects = []
-                
-                for index, subject in enumerate(subjects):
-                    if not newSubjects or (newSubjects and newSubjects[-1].uniqueID != subject.uniqueID):
-                        if subject.uniqueID == cls.timetable.freePeriodID:
-                            total = 0
-                            for s in subjects[index:]:
-                                if s.uniqueID == cls.timetable.freePeriodID:
-                                    total += 1
-                                    continue
-                                break
-                            subject.total = total
-                        newSubjects.append(subject)
-                cls.timetable.table[day] = newSubjects
+            for teacher in cls.teachers:
+                classTeachers.setdefault((cls.uniqueID, teacher.id), teacher)
+        
+        for subjectID, subjectInfo in self.schema.subjects.items():
+            for levelIndex, levelInfo in subjectInfo.levels.items():
+                for classID, placement in levelInfo.classes.items():
+                    cls = self.classes.get(Class.getUniqueID(levelIndex, classID))
+                    teacher = classTeachers.get((cls.uniqueID, placement.teacherID)) if cls is not None else None
+                    
+                    if teacher is not None:
+                        for (dayIndex, period), (coordTotal, coordPerWeek), remainderAmount in placement.coords:
+                            subjectInsert = Subject(subjectID, subjectInfo.name, coordTotal, coordPerWeek, teacher)
+                            
+                            if remainderAmount:
+                                cls.timetable.remainderContent.append(Subject(subjectID, subjectInfo.name, coordTotal, remainderAmount, teacher))
+                            
+                            grids[cls.uniqueID].set(dayIndex, period + 1, subjectInsert, subjectInsert.total)
+        
+        for _, cls in self.classes.items():
+            cls.timetable.setFromSlotGrid(grids[cls.uniqueID])
+
+_generationWorkerProject: ProjectType | None = None
+_generationWorkerSettings: dict[str, Any] | None = None
+_generationWorkerWarmStart: dict[str, tuple] | None = None
+
+def _initGenerationWorker(project: ProjectType, settings: dict[str, Any], warmStartDump: dict[str, tuple] | None = None):
+    global _generationWorkerProject, _generationWorkerSettings, _generationWorkerWarmStart
+    _generationWorkerProject = project
+    _generationWorkerSettings = settings
+    _generationWorkerWarmStart = warmStartDump
+
+def _generateSchoolAttempt(seed: int):
+    school = School(deepcopy(_generationWorkerProject), seed)
+    school.setSchoolInfoFromProjectDict()
+    school.setGenerationSettings(_generationWorkerSettings)
+    
+    if _generationWorkerWarmStart is not None:
+        school.loadTimetablesDump(_generationWorkerWarmStart)
+    school.generateNewSchoolTimetables(warmStart=_generationWorkerWarmStart is not None)
+    
+    return school.getGenerationScore(), school.dumpTimetables()
 
 def _display_school(school: dict[Class, Timetable], drawType: int = 1):
     if drawType == 1:
@@ -360,7 +660,7 @@ def _display_school(school: dict[Class, Timetable], drawType: int = 1):
         
         return nonoptimaltimetable
 
-def test():
+def test(seed: int | None = 0):
     orig_time = time.time()
 
     with open("test_project.json") as file:
@@ -379,7 +679,7 @@ def test():
 
     orig_time = time.time()
 
-    school = School(project)
+    school = School(project, seed)
 
     print()
     print(f"School initialised after {time.time() - orig_time} seconds")
@@ -1,6 +1,17 @@
 from imports import *
 
+STOP_PERFECT = "perfect"
+STOP_MAX_TRIES = "max-tries"
+STOP_TIME_LIMIT = "time-limit"
+STOP_EXHAUSTED = "exhausted"
+STOP_INFEASIBLE = "infeasible"
+
+FREE_PERIOD_ID = "Subject ID: Free"
+BREAK_PERIOD_ID = "Subject ID: Break"
+
 class Subject:
+    __slots__ = ("TOTAL", "PERWEEK", "_teacher", "id", "name", "total", "perWeek", "uniqueID", "lockedPeriod")
+    
     def __init__(self, _id: str, name: str, total: int, perWeek: int, teacher: 'Teacher') -> None:
         self.TOTAL = total
         self.PERWEEK = perWeek
@@ -46,8 +57,282 @@ class Subject:
         
         self.total -= amount
         self.perWeek -= amount
+    
+    def withTotal(self, total: int):
+        subject = Subject(self.id, self.name, total, self.perWeek, self.teacher)
+        subject.lockedPeriod = self.lockedPeriod
+        
+        return subject
+
+class SharedPeriod(Subject):
+    # Free and break blocks carry no teacher or lock, so every block of one length is the same
+    # object. They cannot be changed in place; resize them with withTotal instead
+    __slots__ = ("_frozen",)
+    
+    _instances: dict[tuple[str, int], "SharedPeriod"] = {}
+    
+    def __new__(cls, _id: str, total: int = 1):
+        key = (_id, total)
+        if key not in cls._instances:
+            instance = super().__new__(cls)
+            Subject.__init__(instance, _id, "Free" if _id == FREE_PERIOD_ID else "Break", total, total, None)
+            object.__setattr__(instance, "_frozen", True)
+            
+            cls._instances[key] = instance
+        
+        return cls._instances[key]
+    
+    def __init__(self, _id: str, total: int = 1) -> None:
+        pass
+    
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{self.name} periods are shared and cannot be changed")
+        super().__setattr__(name, value)
+    
+    def __reduce__(self):
+        return SharedPeriod, (self.id, self.total)
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def copy(self):
+        return self
+    
+    def withTotal(self, total: int):
+        return SharedPeriod(self.id, total)
+
+def freeBlock(total: int = 1):
+    return SharedPeriod(FREE_PERIOD_ID, total)
+
+def breakBlock(total: int = 1):
+    return SharedPeriod(BREAK_PERIOD_ID, total)
+
+class DayTable(list):
+    # Run-length list of Subject blocks that keeps the cumulative period count of every block.
+    # Sums are extended lazily and dropped from the first changed block onwards, so callers that
+    # change a block's total in place have to call invalidate themselves
+    def __init__(self, subjects=()) -> None:
+        super().__init__(subjects)
+        self._ends: list[int] = []
+    
+    def invalidate(self, index: int = 0):
+        del self._ends[max(index, 0):]
+    
+    def _changedFrom(self, index):
+        if isinstance(index, slice):
+            return index.indices(len(self))[0]
+        return index + len(self) if index < 0 else index
+    
+    def __setitem__(self, index, value):
+        self.invalidate(self._changedFrom(index))
+        super().__setitem__(index, value)
+    
+    def __delitem__(self, index):
+        self.invalidate(self._changedFrom(index))
+        super().__delitem__(index)
+    
+    def __iadd__(self, subjects):
+        super().__iadd__(subjects)
+        return self
+    
+    def insert(self, index: int, subject: 'Subject'):
+        self.invalidate(min(self._changedFrom(index), len(self)))
+        super().insert(index, subject)
+    
+    def pop(self, index: int = -1):
+        self.invalidate(self._changedFrom(index))
+        return super().pop(index)
+    
+    def remove(self, subject: 'Subject'):
+        self.invalidate(self.index(subject))
+        super().remove(subject)
+    
+    def clear(self):
+        self.invalidate()
+        super().clear()
+    
+    def sort(self, *args, **kwargs):
+        self.invalidate()
+        super().sort(*args, **kwargs)
+    
+    def reverse(self):
+        self.invalidate()
+        super().reverse()
+    
+    def _build(self, upTo: int | None = None):
+        upTo = len(self) if upTo is None else min(upTo, len(self))
+        
+        total = self._ends[-1] if self._ends else 0
+        for index in range(len(self._ends), upTo):
+            total += self[index].total
+            self._ends.append(total)
+    
+    def startOf(self, index: int):
+        self._build(index)
+        return (self._ends[index - 1] if index else 0) + 1
+    
+    def periodCount(self):
+        self._build()
+        return self._ends[-1] if self._ends else 0
+    
+    def indexAt(self, period: int):
+        # Index of the first block that reaches `period`, or len(self) when the day is shorter
+        self._build()
+        return bisect_left(self._ends, period)
+    
+    def subjectAt(self, period: int):
+        index = self.indexAt(period)
+        return self[index] if index < len(self) and period >= 1 else None
+    
+    def indexesStartingBetween(self, first: int, last: int):
+        self._build()
+        
+        start = 0 if first <= 1 else bisect_left(self._ends, first - 1) + 1
+        stop = 0 if last < 1 else bisect_right(self._ends, last - 1) + 1
+        
+        return range(start, min(stop, len(self)))
+
+class WeekTable(dict):
+    def __init__(self, days=()) -> None:
+        super().__init__()
+        self.update(days)
+    
+    def __setitem__(self, day: str, subjects: list['Subject']):
+        super().__setitem__(day, subjects if isinstance(subjects, DayTable) else DayTable(subjects))
+    
+    def update(self, days=(), **kwargs):
+        for day, subjects in dict(days, **kwargs).items():
+            self[day] = subjects
+    
+    def setdefault(self, day: str, subjects=None):
+        if day not in self:
+            self[day] = subjects if subjects is not None else []
+        return self[day]
+
+class SlotGrid:
+    # Days x periods of int16 codes: EMPTY past the end of a day, FREE, BREAK, or 2 + an index into palette
+    EMPTY = -1
+    FREE = 0
+    BREAK = 1
+    
+    def __init__(self, days: list[str], lengths: list[int], palette: list[tuple] | None = None, codes: np.ndarray | None = None, subjects: list[Subject] | None = None) -> None:
+        self.days = list(days)
+        self.lengths = list(lengths)
+        
+        # The class's own subjects, since a block's perWeek only counts what was left when it was placed
+        self.subjects = {subject.id: subject for subject in subjects} if subjects is not None else {}
+        
+        # (subjectID, name, teacherID, perWeek, lockedPeriod); perWeek is the subject's PERWEEK
+        self.palette: list[tuple[str, str, str | None, int, tuple[int, int] | None]] = list(palette) if palette is not None else []
+        self._paletteIndexes = {(subjectID, name, teacherID, lockedPeriod): index for index, (subjectID, name, teacherID, _, lockedPeriod) in enumerate(self.palette)}
+        
+        if codes is None:
+            codes = np.full((len(self.days), max(self.lengths, default=0)), SlotGrid.EMPTY, dtype=np.int16)
+            for dayIndex, length in enumerate(self.lengths):
+                codes[dayIndex, :length] = SlotGrid.FREE
+        
+        self.codes = codes
+    
+    @classmethod
+    def fromTable(cls, table: dict[str, list[Subject]], subjects: list[Subject] | None = None):
+        days = list(table)
+        grid = cls(days, [sum(subject.total for subject in table[day]) for day in days], subjects=subjects)
+        
+        for dayIndex, day in enumerate(days):
+            period = 0
+            for subject in table[day]:
+                grid.codes[dayIndex, period:period + subject.total] = grid.codeFor(subject)
+                period += subject.total
+        
+        return grid
+    
+    @classmethod
+    def frombytes(cls, buffer: bytes, days: list[str], lengths: list[int], palette: list[tuple]):
+        codes = np.frombuffer(buffer, dtype=np.int16).reshape(len(days), max(lengths, default=0)).copy()
+        
+        return cls(days, lengths, palette, codes)
+    
+    def codeFor(self, subject: Subject):
+        if subject.id == FREE_PERIOD_ID:
+            return SlotGrid.FREE
+        if subject.id == BREAK_PERIOD_ID:
+            return SlotGrid.BREAK
+        
+        teacherID = subject.teacher.id if subject.teacher is not None else None
+        lockedPeriod = tuple(subject.lockedPeriod) if subject.lockedPeriod else None
+        key = (subject.id, subject.name, teacherID, lockedPeriod)
+        
+        if key not in self._paletteIndexes:
+            self._paletteIndexes[key] = len(self.palette)
+            self.palette.append((subject.id, subject.name, teacherID, self.subjects.get(subject.id, subject).PERWEEK, lockedPeriod))
+        
+        return self._paletteIndexes[key] + 2
+    
+    def set(self, dayIndex: int, period: int, subject: Subject, total: int = 1):
+        self.codes[dayIndex, period - 1:period - 1 + total] = self.codeFor(subject)
+    
+    def __getitem__(self, position: tuple[int, int]):
+        dayIndex, period = position
+        return int(self.codes[dayIndex, period - 1])
+    
+    def toTable(self, teachers: dict[str, 'Teacher']):
+        table = WeekTable()
+        
+        for dayIndex, day in enumerate(self.days):
+            codes = self.codes[dayIndex, :self.lengths[dayIndex]]
+            
+            # Runs of equal codes become one block each
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.int64)
+            ends = np.r_[starts[1:], len(codes)]
+            
+            subjects = []
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                code = int(codes[start])
+                total = end - start
+                
+                if code == SlotGrid.FREE:
+                    subjects.append(freeBlock(total))
+                elif code == SlotGrid.BREAK:
+                    subjects.append(breakBlock(total))
+                elif code != SlotGrid.EMPTY:
+                    subjectID, name, teacherID, perWeek, lockedPeriod = self.palette[code - 2]
+                    
+                    subject = Subject(subjectID, name, total, perWeek, teachers.get(teacherID) if teacherID is not None else None)
+                    subject.lockedPeriod = list(lockedPeriod) if lockedPeriod else None
+                    subjects.append(subject)
+            
+            table[day] = subjects
+        
+        return table
+    
+    def teacherCodes(self, teacherIndexes: dict[str, int]):
+        # Same shape as codes, holding the teacher index of every lesson and -1 elsewhere
+        lookup = np.array([-1, -1, -1] + [teacherIndexes.get(teacherID, -1) if teacherID is not None else -1 for _, _, teacherID, _, _ in self.palette], dtype=np.int32)
+        
+        return lookup[self.codes + 1]
+    
+    def copy(self):
+        return SlotGrid(self.days, self.lengths, self.palette, self.codes.copy(), list(self.subjects.values()))
+    
+    def tobytes(self):
+        return self.codes.tobytes()
+    
+    def _key(self):
+        return (tuple(self.days), tuple(self.lengths), tuple(self.palette), self.codes.tobytes())
+    
+    def __eq__(self, other):
+        return isinstance(other, SlotGrid) and self._key() == other._key()
+    
+    def __hash__(self):
+        return hash(self._key())
 
 class Class:
+    __slots__ = ("school", "schoolDict", "schoolTeachers", "weekdays", "index", "classID", "uniqueID", "className", "namingConvention", "name", "subjects", "periodsPerDay", "teachers", "breakTimePeriods", "timetable")
+    
     def __init__(self, index: int, classID: str, className: str, subjects: list[Subject], periodsPerDay: list[int], namingConvention: list[str], school, schoolDict: dict, schoolTeachers: dict[str, "Teacher"], weekdays: list[str], breakTimePeriods: list[int]) -> None:
         self.school = school
         self.schoolDict = schoolDict
@@ -86,6 +371,8 @@ class Class:
                         self.teachers[teacher] = subjs
 
 class Teacher:
+    __slots__ = ("id", "name", "subjects")
+    
     def __init__(self, _id: str, name: str, subjects: dict[Subject, Class]) -> None:
         self.id = _id
         self.name = name
@@ -105,22 +392,43 @@ class Timetable:
         
         self.freePeriodAmt = max(sum(self.periodsPerDay) - (sum([subject.perWeek for subject in self.subjects]) + len(self.weekInfo)), 0)
         
-        self.freePeriodID = "Subject ID: Free"
-        self.breakPeriodID = "Subject ID: Break"
+        self.freePeriodID = FREE_PERIOD_ID
+        self.breakPeriodID = BREAK_PERIOD_ID
         
         self._perfectTimetableCounter = 0
         self._maxPerfectTimetableTries = 30
+        self._maxGenerationTime = None
         self._foundPerfectTimeTable = False
+        self.stopReason = None
         
-        self.table: dict[str, list[Subject]] = {day: [] for day in self.cls.weekdays}
+        self.table = WeekTable({day: [] for day in self.cls.weekdays})
         self.remainderContent = []
         
+        self.random = self.cls.school.getClassRandom(self.cls)
+        
         self.reset()
         
-        random.shuffle(self.subjects)
+        self.random.shuffle(self.subjects)
+    
+    @property
+    def table(self):
+        return self._table
+    
+    @table.setter
+    def table(self, table: dict[str, list[Subject]]):
+        self._table = table if isinstance(table, WeekTable) else WeekTable(table)
+    
+    def toSlotGrid(self):
+        return SlotGrid.fromTable(self.table, self.cls.subjects)
+    
+    def setFromSlotGrid(self, grid: SlotGrid):
+        self.table = grid.toTable(self.cls.schoolTeachers)
+    
+    def getCapacity(self):
+        return sum(periods - (1 if 0 < breakPeriod <= periods else 0) for _, periods, breakPeriod in self.weekInfo)
     
     def addFreePeriod(self, day: str, total: int, perWeek: int):
-        self.table[day].append(Subject(self.freePeriodID, "Free", total, perWeek, None))
+        self.table[day].append(freeBlock(total))
     
     def addFreePeriods(self):
         if self.freePeriodAmt:
@@ -131,106 +439,233 @@ class Timetable:
         self.subjects = self._subjects
         self._subjects = [subject.copy() for subject in self.subjects if subject.id != self.freePeriodID]
         
-        self.table: dict[str, list[Subject]] = {day: [] for day in self.cls.weekdays}
+        self.table = WeekTable({day: [] for day in self.cls.weekdays})
         self.remainderContent = []
         
-        random.shuffle(self.subjects)
+        self.random.shuffle(self.subjects)
+    
+    def _publish(self):
+        self.schoolDict[self.cls] = self
+        self.cls.school.occupancy.setTimetable(self)
     
     def switchExtras(self, day: str, subjects: list[Subject]):
-        for subjectIndex, subject in enumerate(subjects):
-            if subject.perWeek > subject.total:
+        # Per filled day: how many blocks of each subject ID it holds, and its block indexes by length
+        dayIDs: dict[str, dict[str, int]] = {}
+        dayTotals: dict[str, dict[int, list[int]]] = {}
+        for timetableDay, subj in self.table.items():
+            dayIDs[timetableDay] = {}
+            dayTotals[timetableDay] = {}
+            for sIndex, s in enumerate(subj):
+                dayIDs[timetableDay][s.id] = dayIDs[timetableDay].get(s.id, 0) + 1
+                dayTotals[timetableDay].setdefault(s.total, []).append(sIndex)
+        
+        subjectIDs: dict[str, int] = {}
+        for subject in subjects:
+            subjectIDs[subject.id] = subjectIDs.get(subject.id, 0) + 1
+        
+        subjectPeriod = 1
+        subjectIndex = 0
+        
+        # subjects grows with the overflow of every swap, and those get a turn as well
+        while subjectIndex < len(subjects):
+            if subjectIndex:
+                subjectPeriod += subjects[subjectIndex - 1].total
+            
+            subject = subjects[subjectIndex]
+            
+            if subject.perWeek > subject.total and subject.total > 0 and not subject.lockedPeriod:
+                # The block given up has to make up exactly what this subject is short of
+                swaps = []
                 for timetableDay, subj in self.table.items():
-                    replaced = False
+                    if dayIDs[timetableDay].get(subject.id):
+                        continue
                     
-                    if not [True for subjInfo in subj if subjInfo.id == subject.id]:
-                        subjectPeriod = sum([subjInfo.total for subjInfo in subjects[:subjectIndex]]) + 1
-                        
-                        for sIndex, s in enumerate(subj):
-                            replacementPeriod = sum([subjInfo.total for subjInfo in subj[:sIndex]])
-                            if not [True for subjInfo in subjects if subjInfo.id == s.id]\
-                               and s.id != self.breakPeriodID and subject.perWeek > s.total\
-                               and subject.total + s.total == subject.perWeek\
-                               and not self.cls.school.findClashes(subject, timetableDay, replacementPeriod, self.cls)\
-                               and not self.cls.school.findClashes(s, day, subjectPeriod, self.cls)\
-                               and not s.lockedPeriod\
-                               and not subject.lockedPeriod:
-                                   tableReplace = subject.copy()
-                                   tableReplace.TOTAL = s.total
-                                   tableReplace.total = tableReplace.TOTAL
-                                   
-                                   subjectReplace = s.copy()
-                                   
-                                   overflowReplace = subject.copy()
-                                   overflowReplace.TOTAL = subject.perWeek - s.total
-                                   overflowReplace.total = overflowReplace.TOTAL
-                                   
-                                   self.table[timetableDay][sIndex] = tableReplace
-                                   subjects[subjectIndex] = subjectReplace
-                                   subjects.append(overflowReplace)
-                                   
-                                   replaced = True
-                                    
-                                   if random.choice([True, False]):
-                                       break
+                    for sIndex in dayTotals[timetableDay].get(subject.perWeek - subject.total, ()):
+                        s = subj[sIndex]
                         
-                    if replaced: break
+                        if not subjectIDs.get(s.id)\
+                           and s.id != self.breakPeriodID\
+                           and not s.lockedPeriod\
+                           and not self.cls.school.findClashes(subject, timetableDay, subj.startOf(sIndex), self.cls)\
+                           and not self.cls.school.findClashes(s, day, subjectPeriod, self.cls):
+                               swaps.append((timetableDay, sIndex))
+                
+                if swaps:
+                    # Giving up a free block moves no other lesson onto this day, so those come first
+                    bestSwaps = [swap for swap in swaps if self.table[swap[0]][swap[1]].teacher is None] or swaps
+                    timetableDay, sIndex = self.random.choice(bestSwaps)
+                    s = self.table[timetableDay][sIndex]
+                    
+                    tableReplace = subject.copy()
+                    tableReplace.TOTAL = s.total
+                    tableReplace.total = tableReplace.TOTAL
+                    
+                    # A fresh block, since s may be a shared free period
+                    subjectReplace = Subject(s.id, s.name, s.total, s.perWeek, s.teacher)
+                    
+                    overflowReplace = subject.copy()
+                    overflowReplace.TOTAL = subject.perWeek - s.total
+                    overflowReplace.total = overflowReplace.TOTAL
+                    
+                    self.table[timetableDay][sIndex] = tableReplace
+                    subjects[subjectIndex] = subjectReplace
+                    subjects.append(overflowReplace)
+                    
+                    dayIDs[timetableDay][s.id] -= 1
+                    dayIDs[timetableDay][subject.id] = dayIDs[timetableDay].get(subject.id, 0) + 1
+                    subjectIDs[s.id] = subjectIDs.get(s.id, 0) + 1
+            
+            subjectIndex += 1
     
     def classSort(self, subjects: list[Subject], subjectDay: str):
         subjectsCopy = [subject.copy() for subject in subjects]
         
-        period = 1
+        subjectsTable = DayTable(subjectsCopy)
+        starts = [subjectsTable.startOf(index) for index in range(len(subjectsTable))]
+        
         nonClashingPeriodsMapping = {}
         for subject in subjectsCopy:
-            nonClash = []
+            clashStarts = self.cls.school.occupancy.getClashStarts(subject, subjectDay, self.cls)
+            
+            # Bit p is set when the subject can go in at period p + 1
+            periodMask = 0
             for nonClashingPeriod in range(self.periodsPerDay[self.cls.weekdays.index(subjectDay)]):
                 condition = not (subject.lockedPeriod[0] <= nonClashingPeriod + 1 <= subject.lockedPeriod[0] + subject.lockedPeriod[1] - 1) if subject.lockedPeriod is not None else True
                 if condition:
-                    if not self.cls.school.findClashes(subject, subjectDay, nonClashingPeriod + 1, self.cls):
-                        tmpSubjPeriod = 1
-                        for subjIndex, subj in enumerate(subjectsCopy):
-                            if nonClashingPeriod + 1 <= tmpSubjPeriod <= nonClashingPeriod + subject.total:
-                                nonClash.append(subjIndex)
-                            tmpSubjPeriod += subj.total
-            nonClashingPeriodsMapping[subject] = list(set(nonClash))
+                    if not clashStarts >> nonClashingPeriod & ((1 << subject.total) - 1):
+                        periodMask |= 1 << nonClashingPeriod
             
-            period += subject.total
+            # A block starting at period `start` suits the subject if it can go in at any of the subject.total periods before it
+            nonClash = []
+            for index, start in enumerate(starts):
+                first = max(start - subject.total, 0)
+                if periodMask >> first & ((1 << (start - first)) - 1):
+                    nonClash.append(index)
+            nonClashingPeriodsMapping[subject] = nonClash
+        
+        # How many subjects can still use each block index
+        useCounts = [0 for _ in subjects]
+        for nonClash in nonClashingPeriodsMapping.values():
+            for index in nonClash:
+                useCounts[index] += 1
         
+        # Each subject keeps the indexes no other subject can use, and stops counting towards the ones it gives up
         for subject, nonClash in sorted(nonClashingPeriodsMapping.items(), key=lambda nCInfo: len(nCInfo[1]), reverse=True):
             if nonClash:
-                allNonClashes = list(nonClashingPeriodsMapping.values())
-                otherNonClashes = list(flatten(allNonClashes[:allNonClashes.index(nonClash)] + allNonClashes[allNonClashes.index(nonClash) + 1:]))
-                nonClashesCopy = nonClash.copy()
-                for index in nonClashesCopy:
-                    if index in otherNonClashes:
-                        nonClashingPeriodsMapping[subject].remove(index)
+                unique = []
+                for index in nonClash:
+                    if useCounts[index] > 1:
+                        useCounts[index] -= 1
+                    else:
+                        unique.append(index)
+                
+                nonClashingPeriodsMapping[subject] = unique
         
         for subject, nonClash in nonClashingPeriodsMapping.items():
             if nonClash:
-                nonClashingPeriodsMapping[subject] = random.choice(nonClash)
+                nonClashingPeriodsMapping[subject] = self.random.choice(nonClash)
             else:
                 nonClashingPeriodsMapping[subject] = None
         
-        takenIndexes = [nonClash for _, nonClash in nonClashingPeriodsMapping.items() if nonClash is not None]
+        takenIndexes = {nonClash for _, nonClash in nonClashingPeriodsMapping.items() if nonClash is not None}
         
         for subject, nonClashingIndex in nonClashingPeriodsMapping.items():
             if not subject.lockedPeriod:
                 if nonClashingIndex is not None:
                     subjects[nonClashingIndex] = subject
                 else:
-                    index = [i for i in range(len(subjects)) if i not in takenIndexes][0]
+                    index = next(i for i in range(len(subjects)) if i not in takenIndexes)
                     subjects[index] = subject
-                    takenIndexes.append(index)
+                    takenIndexes.add(index)
             else:
                 subjects[subject.lockedPeriod[0]] = subject
     
+    def fillFromSlots(self, slots: dict[str, list[Subject | None]], subjects: list[Subject]):
+        placed = {subject.id: 0 for subject in subjects}
+        
+        for day, periods, breakPeriod in self.weekInfo:
+            daySubjects: list[Subject] = []
+            
+            for period in range(1, periods + 1):
+                previous = daySubjects[-1] if daySubjects else None
+                subject = slots[day][period - 1]
+                
+                if period == breakPeriod:
+                    daySubjects.append(breakBlock(1))
+                elif subject is None:
+                    if previous is not None and previous.id == self.freePeriodID:
+                        daySubjects[-1] = freeBlock(previous.total + 1)
+                    else:
+                        daySubjects.append(freeBlock(1))
+                else:
+                    placed[subject.id] += 1
+                    
+                    if previous is not None and previous.id == subject.id:
+                        previous.total += 1
+                        previous.TOTAL = previous.total
+                        previous.perWeek = subject.perWeek - placed[subject.id]
+                    else:
+                        block = Subject(subject.id, subject.name, 1, subject.perWeek - placed[subject.id], subject.teacher)
+                        block.lockedPeriod = subject.lockedPeriod
+                        daySubjects.append(block)
+            
+            self.table[day] = daySubjects
+        
+        self.subjects = []
+        for subject in subjects:
+            if placed[subject.id] < subject.perWeek:
+                remainder = subject.copy()
+                remainder.perWeek = subject.perWeek - placed[subject.id]
+                self.subjects.append(remainder)
+        
+        self.remainderContent = [subject.copy() for subject in self.subjects]
+    
+    def setBudget(self, maxTries: int | None = 30, timeLimit: float | None = None):
+        if maxTries is None and timeLimit is None:
+            raise ValueError("A generation budget needs a try limit, a time limit or both")
+        
+        self._maxPerfectTimetableTries = maxTries
+        self._maxGenerationTime = timeLimit
+    
+    def isPerfect(self):
+        totalSubjectsAmt = sum(self.periodsPerDay)
+        timeTableSubjectsAmt = sum([subject.perWeek for subject in self._subjects]) + len(self.weekInfo)
+        totalRemainingSubjectsAmt = len(self.remainderContent)
+        
+        return max(timeTableSubjectsAmt - totalSubjectsAmt, 0) == totalRemainingSubjectsAmt
+    
     def generate(self):
+        startTime = time.perf_counter()
+        
+        while True:
+            self._generateAttempt()
+            
+            if self.isPerfect():
+                self._foundPerfectTimeTable = True
+                self.stopReason = STOP_PERFECT
+                break
+            
+            if self._maxPerfectTimetableTries is not None and self._perfectTimetableCounter >= self._maxPerfectTimetableTries:
+                self.stopReason = STOP_MAX_TRIES
+                break
+            
+            if self._maxGenerationTime is not None and time.perf_counter() - startTime >= self._maxGenerationTime:
+                self.stopReason = STOP_TIME_LIMIT
+                break
+            
+            self._perfectTimetableCounter += 1
+            self.reset()
+        
+        self._publish()
+    
+    def _generateAttempt(self):
         for dayIndex, (day, periods, breakPeriod) in enumerate(self.weekInfo):
             period = 0
             
             subjects = []
             empties = []
             
-            random.shuffle(self.subjects)
+            self.random.shuffle(self.subjects)
             
             for subject in self.subjects:
                 subject.resetTotal()
@@ -268,16 +703,16 @@ class Timetable:
                 if not breakTime:
                     period += subjectAmount
                     subject.remove(subjectAmount)
-                    subjects.append(Subject(subject.id, subject.name, subjectAmount, subject.perWeek, subject.teacher))
+                    subjects.append(freeBlock(subjectAmount) if subject.id == self.freePeriodID else Subject(subject.id, subject.name, subjectAmount, subject.perWeek, subject.teacher))
                 else:
                     period += 1
-                    subjects.append(Subject(self.breakPeriodID, 'Break', 1, 1, None))
+                    subjects.append(breakBlock(1))
                     
                     self.subjects.append(subject)
                     empties.append(subjectIndex)
             
             rem_periods = periods - sum([s.total for s in subjects])
-            subjects.append(Subject(self.freePeriodID, "Free", rem_periods, rem_periods, None))
+            subjects.append(freeBlock(rem_periods))
             
             self.table[day] = subjects
             
@@ -290,37 +725,20 @@ class Timetable:
         
         for dayIndex, (_, subjects) in enumerate(self.table.items()):
             if self.breakPeriodID not in [subject.id for subject in subjects]:
-                period = 1
-                for subjectIndex, subject in enumerate(subjects):
-                    period += subject.total
-                    if period >= self.breakTimePeriods[dayIndex]:
-                        if period == self.breakTimePeriods[dayIndex]:
-                            subjects.insert(subjectIndex + 1, Subject(self.breakPeriodID, 'Break', 1, 1, None))
-                        elif period > self.breakTimePeriods[dayIndex]:
-                            replacementAmt = period - self.breakTimePeriods[dayIndex]
-                            subject.total -= replacementAmt
-                            
-                            subjects.insert(subjectIndex + 1, Subject(self.breakPeriodID, 'Break', 1, 1, None))
-                            subjects.insert(subjectIndex + 2, Subject(subject.id, subject.name, replacementAmt, subject.perWeek, subject.teacher))
-                        break
+                # The first block that runs up to the period before the break
+                subjectIndex = subjects.indexAt(self.breakTimePeriods[dayIndex] - 1)
+                if subjectIndex < len(subjects):
+                    subject = subjects[subjectIndex]
+                    period = subjects.startOf(subjectIndex) + subject.total
+                    
+                    if period == self.breakTimePeriods[dayIndex]:
+                        subjects.insert(subjectIndex + 1, breakBlock(1))
+                    elif period > self.breakTimePeriods[dayIndex]:
+                        replacementAmt = period - self.breakTimePeriods[dayIndex]
+                        subjects[subjectIndex] = subject.withTotal(subject.total - replacementAmt)
+                        
+                        subjects.insert(subjectIndex + 1, breakBlock(1))
+                        subjects.insert(subjectIndex + 2, subject.withTotal(replacementAmt))
         
         self.remainderContent = [subj.copy() for subj in self.subjects]
-        
-        if self._foundPerfectTimeTable:
-            return
-        
-        if self._perfectTimetableCounter < self._maxPerfectTimetableTries:
-            totalSubjectsAmt = sum(self.periodsPerDay)
-            timeTableSubjectsAmt = sum([subject.perWeek for subject in self._subjects]) + len(self.weekInfo)
-            totalRemainingSubjectsAmt = len(self.remainderContent)
-            
-            if max(timeTableSubjectsAmt - totalSubjectsAmt, 0) == totalRemainingSubjectsAmt:
-                self._foundPerfectTimeTable = True
-                self.schoolDict[self.cls] = self
-            else:
-                self._perfectTimetableCounter += 1
-                self.reset()
-                self.generate()
-        else:
-            self.schoolDict[self.cls] = self
 
@@ -0,0 +1,175 @@
+from middle.objects import *
+
+class TeacherOccupancy:
+    def __init__(self) -> None:
+        # teacherID -> day -> period -> [(subject, cls, startPeriod), ...]
+        self.slots: dict[str, dict[str, dict[int, list[tuple[Subject, Class, int]]]]] = {}
+        self._classEntries: dict[str, list[tuple[str, str, int]]] = {}
+    
+    def clear(self):
+        self.slots = {}
+        self._classEntries = {}
+    
+    def rebuild(self, schoolDict: dict[Class, Timetable]):
+        self.clear()
+        
+        for _, timetable in schoolDict.items():
+            self.setTimetable(timetable)
+    
+    def setTimetable(self, timetable: Timetable):
+        self.removeClass(timetable.cls)
+        
+        for day, subjects in timetable.table.items():
+            period = 1
+            for subject in subjects:
+                self.add(timetable.cls, day, period, subject)
+                period += subject.total
+    
+    def add(self, cls: Class, day: str, period: int, subject: Subject):
+        if subject.teacher is None:
+            return
+        
+        teacherDays = self.slots.setdefault(subject.teacher.id, {})
+        dayPeriods = teacherDays.setdefault(day, {})
+        classEntries = self._classEntries.setdefault(cls.uniqueID, [])
+        
+        for p in range(period, period + max(subject.total, 1)):
+            dayPeriods.setdefault(p, []).append((subject, cls, period))
+            classEntries.append((subject.teacher.id, day, p))
+    
+    def removeClass(self, cls: Class):
+        for teacherID, day, period in self._classEntries.pop(cls.uniqueID, []):
+            dayPeriods = self.slots[teacherID][day]
+            entries = [entry for entry in dayPeriods.get(period, []) if entry[1].uniqueID != cls.uniqueID]
+            
+            if entries:
+                dayPeriods[period] = entries
+            else:
+                dayPeriods.pop(period, None)
+    
+    def isBusy(self, teacherID: str, day: str, period: int, cls: Class | None = None):
+        for _, ttCls, _ in self.slots.get(teacherID, {}).get(day, {}).get(period, ()):
+            if cls is None or ttCls.uniqueID != cls.uniqueID:
+                return True
+        
+        return False
+    
+    def findClashes(self, subject: Subject, day: str, period: int, cls: Class):
+        clashes: list[tuple[Subject, Class]] = []
+        
+        if subject.teacher is None:
+            return clashes
+        
+        dayPeriods = self.slots.get(subject.teacher.id, {}).get(day)
+        if not dayPeriods:
+            return clashes
+        
+        # Only blocks starting inside [period, period + total - 1] count, matching the original table scan
+        for p in range(period, period + subject.total):
+            for subj, ttCls, startPeriod in dayPeriods.get(p, ()):
+                if startPeriod == p and ttCls.uniqueID != cls.uniqueID:
+                    clashes.append([subj, ttCls])
+        
+        return clashes
+    
+    def getClashStarts(self, subject: Subject, day: str, cls: Class):
+        # Bit p - 1 is set for every period p where another class starts a block with the subject's teacher,
+        # so findClashes(subject, day, p, cls) is empty exactly when the subject.total bits from p - 1 are clear
+        starts = 0
+        
+        if subject.teacher is None:
+            return starts
+        
+        for p, entries in self.slots.get(subject.teacher.id, {}).get(day, {}).items():
+            if any(startPeriod == p and ttCls.uniqueID != cls.uniqueID for _, ttCls, startPeriod in entries):
+                starts |= 1 << (p - 1)
+        
+        return starts
+
+
+class OccupancyTensor:
+    def __init__(self) -> None:
+        self.teacherIndexes: dict[str, int] = {}
+        self.dayIndexes: dict[str, int] = {}
+        self.counts = np.zeros((0, 0, 0), dtype=np.int32)
+        
+        self._blocks: list[tuple[Subject, Class]] = []
+        self._blockSlots = np.zeros(0, dtype=np.int64)
+        self._blockIndexes = np.zeros(0, dtype=np.int64)
+    
+    def build(self, schoolDict: dict[Class, Timetable]):
+        self.teacherIndexes = {}
+        self.dayIndexes = {}
+        self._blocks = []
+        
+        teachers = []
+        days = []
+        starts = []
+        totals = []
+        
+        for cls, timetable in schoolDict.items():
+            for day, subjects in timetable.table.items():
+                dayIndex = self.dayIndexes.setdefault(day, len(self.dayIndexes))
+                
+                period = 1
+                for subject in subjects:
+                    if subject.teacher is not None and subject.total > 0:
+                        self._blocks.append((subject, cls))
+                        teachers.append(self.teacherIndexes.setdefault(subject.teacher.id, len(self.teacherIndexes)))
+                        days.append(dayIndex)
+                        starts.append(period)
+                        totals.append(subject.total)
+                    period += subject.total
+        
+        totals = np.asarray(totals, dtype=np.int64)
+        maxPeriod = int((np.asarray(starts, dtype=np.int64) + totals).max()) if self._blocks else 1
+        
+        # One entry per period covered by a block: block b spans start[b] .. start[b] + total[b] - 1
+        self._blockIndexes = np.repeat(np.arange(len(self._blocks), dtype=np.int64), totals)
+        offsets = np.arange(len(self._blockIndexes), dtype=np.int64) - np.repeat(np.cumsum(totals) - totals, totals)
+        periods = np.repeat(np.asarray(starts, dtype=np.int64), totals) + offsets
+        
+        shape = (len(self.teacherIndexes), len(self.dayIndexes), maxPeriod)
+        self._blockSlots = np.ravel_multi_index((np.repeat(np.asarray(teachers, dtype=np.int64), totals), np.repeat(np.asarray(days, dtype=np.int64), totals), periods), shape) if self._blocks else self._blockSlots[:0]
+        self.counts = np.bincount(self._blockSlots, minlength=int(np.prod(shape))).astype(np.int32).reshape(shape)
+    
+    def clashMask(self):
+        return self.counts > 1
+    
+    def _clashingBlockPairs(self):
+        clashing = self.clashMask().ravel()[self._blockSlots]
+        slots = self._blockSlots[clashing]
+        blockIndexes = self._blockIndexes[clashing]
+        
+        order = np.argsort(slots, kind="stable")
+        slots = slots[order]
+        blockIndexes = blockIndexes[order]
+        
+        pairs: dict[tuple[int, int], None] = {}
+        
+        groupStarts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]]).tolist() if len(slots) else []
+        groupEnds = groupStarts[1:] + [len(slots)]
+        
+        for groupStart, groupEnd in zip(groupStarts, groupEnds):
+            group = blockIndexes[groupStart:groupEnd].tolist()
+            for i, blockIndex in enumerate(group):
+                for otherIndex in group[i + 1:]:
+                    pairs[blockIndex, otherIndex] = None
+        
+        return list(pairs)
+    
+    def clashPairs(self):
+        return [(self._blocks[blockIndex], self._blocks[otherIndex]) for blockIndex, otherIndex in self._clashingBlockPairs()]
+    
+    def getClashes(self):
+        clashes: dict[Subject, list[list[list[Subject | Class]]]] = {}
+        blockClashes: dict[int, list[list[Subject | Class]]] = {}
+        
+        for blockIndex, otherIndex in self._clashingBlockPairs():
+            blockClashes.setdefault(blockIndex, []).append(list(self._blocks[otherIndex]))
+            blockClashes.setdefault(otherIndex, []).append(list(self._blocks[blockIndex]))
+        
+        for blockIndex, clash in sorted(blockClashes.items()):
+            clashes.setdefault(self._blocks[blockIndex][0], []).append(clash)
+        
+        return clashes
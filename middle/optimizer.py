@@ -0,0 +1,185 @@
+from middle.grid import *
+
+from abc import ABC, abstractmethod
+
+SCOPE_CLASS_DAY = "class-day"
+SCOPE_TEACHER_DAY = "teacher-day"
+SCOPE_CLASS_SUBJECT = "class-subject"
+
+class ScoringTerm(ABC):
+    scope = SCOPE_CLASS_DAY
+    
+    def __init__(self, weight: float = 1) -> None:
+        self.weight = weight
+    
+    @abstractmethod
+    def score(self, grid: SchoolGrid, key: tuple) -> float:
+        pass
+
+class TeacherClashTerm(ScoringTerm):
+    scope = SCOPE_TEACHER_DAY
+    
+    def score(self, grid: SchoolGrid, key: tuple[str, str]):
+        teacherID, day = key
+        
+        return sum(max(grid.teacherCounts.get((teacherID, day, period), 0) - 1, 0) for period in range(1, grid.dayPeriods[day] + 1))
+
+class TeacherIdleGapTerm(ScoringTerm):
+    scope = SCOPE_TEACHER_DAY
+    
+    def score(self, grid: SchoolGrid, key: tuple[str, str]):
+        teacherID, day = key
+        busy = [period for period in range(1, grid.dayPeriods[day] + 1) if grid.teacherCounts.get((teacherID, day, period), 0)]
+        
+        return busy[-1] - busy[0] + 1 - len(busy) if busy else 0
+
+class SubjectSpreadTerm(ScoringTerm):
+    scope = SCOPE_CLASS_SUBJECT
+    
+    def score(self, grid: SchoolGrid, key: tuple[int, str]):
+        classIndex, subjectID = key
+        days = sum(1 for dayGrid in grid.grids[classIndex].values() if subjectID in dayGrid)
+        
+        # Lessons that could have gone on another day but share one instead
+        return min(grid.placed[classIndex][subjectID], len(grid.grids[classIndex])) - days
+
+class DoubleAfterBreakTerm(ScoringTerm):
+    scope = SCOPE_CLASS_DAY
+    
+    def score(self, grid: SchoolGrid, key: tuple[int, str]):
+        classIndex, day = key
+        dayGrid = grid.grids[classIndex][day]
+        breakPeriod = grid.breakPeriods[classIndex][day]
+        
+        if not 0 < breakPeriod < len(dayGrid) - 1:
+            return 0
+        
+        # breakPeriod is 1-based, so it is also the index of the first period after the break
+        return int(dayGrid[breakPeriod] is not None and dayGrid[breakPeriod] == dayGrid[breakPeriod + 1])
+
+class BlockShapeTerm(ScoringTerm):
+    scope = SCOPE_CLASS_DAY
+    
+    def score(self, grid: SchoolGrid, key: tuple[int, str]):
+        return grid.shapeCost(*key)
+
+def defaultScoringTerms():
+    return [
+        TeacherClashTerm(10),
+        BlockShapeTerm(5),
+        TeacherIdleGapTerm(1),
+        SubjectSpreadTerm(1),
+        DoubleAfterBreakTerm(1)
+    ]
+
+class TabuOptimizer(SchoolGrid):
+    def __init__(self, schoolDict: dict[Class, Timetable], terms: list[ScoringTerm] | None = None, maxIterations: int | None = 500, timeLimit: float | None = None, neighbourhoodSize: int = 50, tenure: int = 15, rng: random.Random | None = None) -> None:
+        super().__init__(schoolDict, rng)
+        
+        if maxIterations is None and timeLimit is None:
+            raise ValueError("An optimizer budget needs an iteration limit, a time limit or both")
+        
+        self.terms = terms if terms is not None else defaultScoringTerms()
+        
+        self.maxIterations = maxIterations
+        self.timeLimit = timeLimit
+        self.neighbourhoodSize = neighbourhoodSize
+        self.tenure = tenure
+        
+        teacherIDs = {subject.teacher.id for subjects in self.subjects for subject in subjects.values()}
+        
+        self.keys: dict[str, list[tuple]] = {
+            SCOPE_CLASS_DAY: [(classIndex, day) for classIndex, grid in enumerate(self.grids) for day in grid],
+            SCOPE_TEACHER_DAY: [(teacherID, day) for teacherID in sorted(teacherIDs) for day in self.dayPeriods],
+            SCOPE_CLASS_SUBJECT: [(classIndex, subjectID) for classIndex, subjects in enumerate(self.subjects) for subjectID in subjects]
+        }
+        
+        # (classIndex, day, index, subjectID) -> iteration until which placing that value there is tabu
+        self.tabu: dict[tuple[int, str, int, str | None], int] = {}
+        
+        self.cost = self._totalCost()
+        self.bestCost = self.cost
+        
+        self.iterations = 0
+    
+    def getScores(self):
+        return {type(term).__name__: sum(term.score(self, key) for key in self.keys[term.scope]) for term in self.terms}
+    
+    def _totalCost(self):
+        return sum(term.weight * term.score(self, key) for term in self.terms for key in self.keys[term.scope])
+    
+    def _affectedKeys(self, classIndex: int, changes: list[tuple[str, int, str | None]]):
+        keys = {SCOPE_CLASS_DAY: set(), SCOPE_TEACHER_DAY: set(), SCOPE_CLASS_SUBJECT: set()}
+        
+        for day, index, value in changes:
+            keys[SCOPE_CLASS_DAY].add((classIndex, day))
+            for subjectID in (self.grids[classIndex][day][index], value):
+                if subjectID is not None:
+                    keys[SCOPE_TEACHER_DAY].add((self.subjects[classIndex][subjectID].teacher.id, day))
+                    keys[SCOPE_CLASS_SUBJECT].add((classIndex, subjectID))
+        
+        return keys
+    
+    def _localCost(self, keys: dict[str, set[tuple]]):
+        return sum(term.weight * term.score(self, key) for term in self.terms for key in keys[term.scope])
+    
+    def _change(self, classIndex: int, changes: list[tuple[str, int, str | None]]):
+        keys = self._affectedKeys(classIndex, changes)
+        before = self._localCost(keys)
+        
+        undo = [(day, index, self.grids[classIndex][day][index]) for day, index, _ in changes]
+        for day, index, value in changes:
+            self._set(classIndex, day, index, value)
+        
+        return self._localCost(keys) - before, undo
+    
+    def _isTabu(self, classIndex: int, changes: list[tuple[str, int, str | None]]):
+        return any(self.tabu.get((classIndex, day, index, value), 0) > self.iterations for day, index, value in changes)
+    
+    def optimize(self):
+        startTime = time.perf_counter()
+        
+        while self.bestCost > 0:
+            if self.maxIterations is not None and self.iterations >= self.maxIterations:
+                break
+            
+            if self.timeLimit is not None and time.perf_counter() - startTime >= self.timeLimit:
+                break
+            
+            self.iterations += 1
+            
+            best = None
+            for _ in range(self.neighbourhoodSize):
+                classIndex = self.random.randrange(len(self.grids))
+                changes = self._proposeSwap(classIndex)
+                if changes is None:
+                    continue
+                
+                delta, undo = self._change(classIndex, changes)
+                for day, index, value in undo:
+                    self._set(classIndex, day, index, value)
+                
+                # Tabu moves are still taken when they beat the best table seen so far
+                if self._isTabu(classIndex, changes) and self.cost + delta >= self.bestCost:
+                    continue
+                
+                if best is None or delta < best[0]:
+                    best = (delta, classIndex, changes, undo)
+            
+            if best is None:
+                continue
+            
+            delta, classIndex, changes, undo = best
+            for day, index, value in changes:
+                self._set(classIndex, day, index, value)
+            
+            # Moving the old values straight back is forbidden for a while
+            for day, index, value in undo:
+                self.tabu[classIndex, day, index, value] = self.iterations + self.tenure
+            
+            self.cost += delta
+            if self.cost < self.bestCost:
+                self.bestCost = self.cost
+                self.bestGrids = self._snapshot()
+        
+        return self.bestCost
@@ -0,0 +1,121 @@
+from middle.grid import *
+
+class AnnealingRepair(SchoolGrid):
+    def __init__(self, schoolDict: dict[Class, Timetable], maxIterations: int | None = 20000, timeLimit: float | None = None, startTemperature: float = 2.0, endTemperature: float = 0.05, clashWeight: float = 3, remainderWeight: float = 2, shapeWeight: float = 1, rng: random.Random | None = None) -> None:
+        super().__init__(schoolDict, rng)
+        
+        if maxIterations is None and timeLimit is None:
+            raise ValueError("A repair budget needs an iteration limit, a time limit or both")
+        
+        self.maxIterations = maxIterations
+        self.timeLimit = timeLimit
+        self.startTemperature = startTemperature
+        self.endTemperature = endTemperature
+        
+        self.clashWeight = clashWeight
+        self.remainderWeight = remainderWeight
+        self.shapeWeight = shapeWeight
+        
+        self.cost = self._totalCost()
+        self.bestCost = self.cost
+        
+        self.iterations = 0
+        self.accepted = 0
+    
+    def _remainderCost(self, classIndex: int, subjectID: str):
+        return max(self.subjects[classIndex][subjectID].PERWEEK - self.placed[classIndex][subjectID], 0)
+    
+    def _totalCost(self):
+        cost = self.clashWeight * sum(max(count - 1, 0) for count in self.teacherCounts.values())
+        
+        for classIndex, grid in enumerate(self.grids):
+            cost += self.remainderWeight * sum(self._remainderCost(classIndex, subjectID) for subjectID in self.subjects[classIndex])
+            cost += self.shapeWeight * sum(self.shapeCost(classIndex, day) for day in grid)
+        
+        return cost
+    
+    def _localCost(self, classIndex: int, teacherKeys: set[tuple[str, str, int]], subjectIDs: set[str], days: set[str]):
+        cost = self.clashWeight * sum(max(self.teacherCounts.get(key, 0) - 1, 0) for key in teacherKeys)
+        cost += self.remainderWeight * sum(self._remainderCost(classIndex, subjectID) for subjectID in subjectIDs)
+        cost += self.shapeWeight * sum(self.shapeCost(classIndex, day) for day in days)
+        
+        return cost
+    
+    def _change(self, classIndex: int, changes: list[tuple[str, int, str | None]]):
+        teacherKeys = set()
+        subjectIDs = set()
+        days = set()
+        
+        for day, index, value in changes:
+            days.add(day)
+            for subjectID in (self.grids[classIndex][day][index], value):
+                if subjectID is not None:
+                    subjectIDs.add(subjectID)
+                    teacherKeys.add((self.subjects[classIndex][subjectID].teacher.id, day, index + 1))
+        
+        before = self._localCost(classIndex, teacherKeys, subjectIDs, days)
+        
+        undo = [(day, index, self.grids[classIndex][day][index]) for day, index, _ in changes]
+        for day, index, value in changes:
+            self._set(classIndex, day, index, value)
+        
+        return self._localCost(classIndex, teacherKeys, subjectIDs, days) - before, undo
+    
+    def _proposeMove(self):
+        classIndex = self.random.randrange(len(self.grids))
+        movable = self.movable[classIndex]
+        
+        if len(movable) < 2:
+            return None
+        
+        missing = [subjectID for subjectID in self.subjects[classIndex] if self._remainderCost(classIndex, subjectID)]
+        
+        # Either place a missing lesson over a slot, or swap two slots of the class
+        if missing and self.random.random() < 0.5:
+            subjectID = self.random.choice(missing)
+            day, index = self.random.choice(movable)
+            
+            if not self._allowed(classIndex, index, subjectID) or self.grids[classIndex][day][index] == subjectID:
+                return None
+            
+            return classIndex, [(day, index, subjectID)]
+        
+        changes = self._proposeSwap(classIndex)
+        
+        return (classIndex, changes) if changes is not None else None
+    
+    def repair(self):
+        startTime = time.perf_counter()
+        
+        while self.bestCost > 0:
+            if self.maxIterations is not None and self.iterations >= self.maxIterations:
+                break
+            
+            elapsed = time.perf_counter() - startTime
+            if self.timeLimit is not None and elapsed >= self.timeLimit:
+                break
+            
+            progress = max(self.iterations / self.maxIterations if self.maxIterations is not None else 0, elapsed / self.timeLimit if self.timeLimit is not None else 0)
+            temperature = self.startTemperature * (self.endTemperature / self.startTemperature) ** progress
+            
+            self.iterations += 1
+            
+            move = self._proposeMove()
+            if move is None:
+                continue
+            
+            classIndex, changes = move
+            delta, undo = self._change(classIndex, changes)
+            
+            if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+                self.cost += delta
+                self.accepted += 1
+                
+                if self.cost < self.bestCost:
+                    self.bestCost = self.cost
+                    self.bestGrids = self._snapshot()
+            else:
+                for day, index, value in undo:
+                    self._set(classIndex, day, index, value)
+        
+        return self.bestCost
@@ -0,0 +1,138 @@
+from middle.objects import *
+
+def getClassConstrainedness(classes: list[Class]):
+    teacherLoad: dict[str, int] = {}
+    teacherSlots: dict[str, int] = {}
+    
+    for cls in classes:
+        capacity = cls.timetable.getCapacity()
+        for subject in cls.subjects:
+            if subject.teacher is not None:
+                teacherLoad[subject.teacher.id] = teacherLoad.get(subject.teacher.id, 0) + subject.PERWEEK
+                teacherSlots[subject.teacher.id] = max(teacherSlots.get(subject.teacher.id, 0), capacity)
+    
+    scores = {}
+    for cls in classes:
+        capacity = max(cls.timetable.getCapacity(), 1)
+        demand = sum(subject.PERWEEK for subject in cls.subjects)
+        
+        # Class pressure plus each lesson weighted by how saturated its teacher is
+        teacherPressure = sum(subject.PERWEEK * teacherLoad[subject.teacher.id] / max(teacherSlots[subject.teacher.id], 1) for subject in cls.subjects if subject.teacher is not None)
+        scores[cls.uniqueID] = (demand + teacherPressure) / capacity
+    
+    return scores
+
+def mostConstrainedFirst(classes: list[Class]):
+    scores = getClassConstrainedness(classes)
+    
+    return sorted(classes, key=lambda cls: scores[cls.uniqueID], reverse=True)
+
+def insertionOrder(classes: list[Class]):
+    return list(classes)
+
+class WholeSchoolScheduler:
+    def __init__(self, timetables: list[Timetable], occupancy=None) -> None:
+        self.timetables = timetables
+        self.occupancy = occupancy
+        self.order = {timetable.cls.uniqueID: index for index, timetable in enumerate(self.timetables)}
+        
+        self.subjects = {timetable.cls.uniqueID: sorted([subject for subject in timetable.subjects if subject.id != timetable.freePeriodID and subject.perWeek > 0], key=lambda subject: subject.id) for timetable in self.timetables}
+        self.remaining = {classID: {subject.id: subject.perWeek for subject in subjects} for classID, subjects in self.subjects.items()}
+        self.slots = {timetable.cls.uniqueID: {day: [None for _ in range(periods)] for day, periods, _ in timetable.weekInfo} for timetable in self.timetables}
+        self.dayAmounts = {timetable.cls.uniqueID: {day: {} for day in timetable.cls.weekdays} for timetable in self.timetables}
+        
+        # Shared occupancy for the whole pass: (teacherID, day, period)
+        self.teacherSlots: set[tuple[str, str, int]] = set()
+        
+        self.teacherLoad: dict[str, int] = {}
+        for _, subjects in self.subjects.items():
+            for subject in subjects:
+                self.teacherLoad[subject.teacher.id] = self.teacherLoad.get(subject.teacher.id, 0) + subject.perWeek
+    
+    def _candidates(self, timetable: Timetable, day: str, period: int):
+        classID = timetable.cls.uniqueID
+        previous = self.slots[classID][day][period - 2] if period > 1 else None
+        dayAmounts = self.dayAmounts[classID][day]
+        
+        candidates = []
+        for subject in self.subjects[classID]:
+            if not self.remaining[classID][subject.id] or (subject.teacher.id, day, period) in self.teacherSlots:
+                continue
+            
+            # A locked subject only ever goes on its locked rows
+            if subject.lockedPeriod and not subject.lockedPeriod[0] < period <= subject.lockedPeriod[0] + subject.lockedPeriod[1]:
+                continue
+            
+            if self.occupancy is not None and self.occupancy.isBusy(subject.teacher.id, day, period, timetable.cls):
+                continue
+            
+            dayAmount = dayAmounts.get(subject.id, 0)
+            
+            # One contiguous block per subject per day, no longer than its daily total
+            if dayAmount == 0 or (previous is subject and dayAmount < subject.TOTAL):
+                candidates.append(subject)
+        
+        return candidates
+    
+    def _choose(self, timetable: Timetable, day: str, period: int, candidates: list[Subject]):
+        previous = self.slots[timetable.cls.uniqueID][day][period - 2] if period > 1 else None
+        remaining = self.remaining[timetable.cls.uniqueID]
+        
+        return min(candidates, key=lambda subject: (subject is not previous, -remaining[subject.id], -self.teacherLoad[subject.teacher.id], subject.id))
+    
+    def _place(self, timetable: Timetable, day: str, period: int, subject: Subject):
+        self.slots[timetable.cls.uniqueID][day][period - 1] = subject
+        self.dayAmounts[timetable.cls.uniqueID][day][subject.id] = self.dayAmounts[timetable.cls.uniqueID][day].get(subject.id, 0) + 1
+        self.remaining[timetable.cls.uniqueID][subject.id] -= 1
+        self.teacherLoad[subject.teacher.id] -= 1
+        self.teacherSlots.add((subject.teacher.id, day, period))
+    
+    def _placeLocked(self):
+        # Locked subjects take their rows before the round-robin, as the other engines fix them first
+        for timetable in self.timetables:
+            for subject in self.subjects[timetable.cls.uniqueID]:
+                if not subject.lockedPeriod:
+                    continue
+                
+                startRow, length = subject.lockedPeriod
+                for day, periods, breakPeriod in timetable.weekInfo:
+                    for period in range(startRow + 1, min(startRow + length, periods) + 1):
+                        if period != breakPeriod and self.slots[timetable.cls.uniqueID][day][period - 1] is None and subject in self._candidates(timetable, day, period):
+                            self._place(timetable, day, period, subject)
+    
+    def schedule(self):
+        days: list[str] = []
+        for timetable in self.timetables:
+            for day in timetable.cls.weekdays:
+                if day not in days:
+                    days.append(day)
+        
+        self._placeLocked()
+        
+        for day in days:
+            dayTimetables = [(timetable, dict((d, (p, b)) for d, p, b in timetable.weekInfo)[day]) for timetable in self.timetables if day in timetable.cls.weekdays]
+            maxPeriods = max((periods for _, (periods, _) in dayTimetables), default=0)
+            
+            for period in range(1, maxPeriods + 1):
+                pending = []
+                for timetable, (periods, breakPeriod) in dayTimetables:
+                    if period <= periods and period != breakPeriod and self.slots[timetable.cls.uniqueID][day][period - 1] is None:
+                        pending.append(timetable)
+                
+                # Priority queue for this period: the class with the fewest options places first, and
+                # its options are re-checked at its turn since earlier placements may have taken a teacher
+                pending.sort(key=lambda timetable: (len(self._candidates(timetable, day, period)) or float("inf"), self.order[timetable.cls.uniqueID]))
+                
+                for timetable in pending:
+                    candidates = self._candidates(timetable, day, period)
+                    if not candidates:
+                        continue
+                    
+                    self._place(timetable, day, period, self._choose(timetable, day, period, candidates))
+        
+        for timetable in self.timetables:
+            timetable.fillFromSlots(self.slots[timetable.cls.uniqueID], self.subjects[timetable.cls.uniqueID])
+            
+            timetable._foundPerfectTimeTable = not timetable.remainderContent
+            timetable.stopReason = STOP_PERFECT if timetable._foundPerfectTimeTable else STOP_EXHAUSTED
+            timetable._publish()
@@ -0,0 +1,305 @@
+from middle.objects import *
+
+class ProjectSchemaError(ValueError):
+    def __init__(self, path: list, message: str) -> None:
+        self.path = path
+        
+        super().__init__(f"{'/'.join(str(key) for key in path)}: {message}" if path else message)
+
+class ClassInfo:
+    __slots__ = ("levelIndex", "classID", "name", "periodsPerDay", "breakPeriods", "weekdays")
+    
+    def __init__(self, levelIndex: int, classID: str, name: str, periodsPerDay: list[int], breakPeriods: list[int], weekdays: list[str]) -> None:
+        self.levelIndex = levelIndex
+        self.classID = classID
+        self.name = name
+        
+        self.periodsPerDay = periodsPerDay
+        self.breakPeriods = breakPeriods
+        self.weekdays = weekdays
+
+class LevelInfo:
+    __slots__ = ("index", "name", "classes")
+    
+    def __init__(self, index: int, name: str, classes: dict[str, ClassInfo]) -> None:
+        self.index = index
+        self.name = name
+        self.classes = classes
+
+class TeacherLevelInfo:
+    __slots__ = ("maxRandomAmt", "classIDs")
+    
+    def __init__(self, maxRandomAmt: int, classIDs: list[str]) -> None:
+        self.maxRandomAmt = maxRandomAmt
+        
+        # No listed classes means the teacher is handed some of the level's classes when subjects are made
+        self.classIDs = classIDs
+
+class TeacherMapping:
+    __slots__ = ("teacherID", "name", "levels")
+    
+    def __init__(self, teacherID: str, name: str, levels: dict[int, TeacherLevelInfo]) -> None:
+        self.teacherID = teacherID
+        self.name = name
+        self.levels = levels
+
+class SubjectMapping:
+    __slots__ = ("subjectID", "name", "timings", "classes", "teachers")
+    
+    def __init__(self, subjectID: str, name: str, timings: dict[int, tuple[int, int]], classes: dict[int, list[str]], teachers: dict[str, TeacherMapping]) -> None:
+        self.subjectID = subjectID
+        self.name = name
+        
+        # (per day, per week) for every level the subject is taught in
+        self.timings = timings
+        
+        # Levels missing here take the subject in every class
+        self.classes = classes
+        self.teachers = teachers
+
+class Placement:
+    __slots__ = ("teacherID", "teacherName", "coords")
+    
+    def __init__(self, teacherID: str, teacherName: str, coords: list) -> None:
+        self.teacherID = teacherID
+        self.teacherName = teacherName
+        
+        # The project's own list of ((dayIndex, period), (total, perWeek), remainderAmount), so edits made here are saved with it
+        self.coords = coords
+
+class SubjectLevelInfo:
+    __slots__ = ("perDay", "perWeek", "classes")
+    
+    def __init__(self, perDay: int, perWeek: int, classes: dict[str, Placement]) -> None:
+        self.perDay = perDay
+        self.perWeek = perWeek
+        self.classes = classes
+
+class SubjectInfo:
+    __slots__ = ("subjectID", "name", "levels")
+    
+    def __init__(self, subjectID: str, name: str, levels: dict[int, SubjectLevelInfo]) -> None:
+        self.subjectID = subjectID
+        self.name = name
+        self.levels = levels
+
+def _expectDict(value, path: list):
+    if not isinstance(value, dict):
+        raise ProjectSchemaError(path, f"expected a mapping, got {type(value).__name__}")
+    
+    return value
+
+def _expectSequence(value, path: list, length: int | None = None):
+    if not isinstance(value, (list, tuple)):
+        raise ProjectSchemaError(path, f"expected a list, got {type(value).__name__}")
+    
+    if length is not None and len(value) != length:
+        raise ProjectSchemaError(path, f"expected {length} items, got {len(value)}")
+    
+    return value if isinstance(value, list) else list(value)
+
+def _expectStr(value, path: list):
+    if not isinstance(value, str):
+        raise ProjectSchemaError(path, f"expected text, got {type(value).__name__}")
+    
+    return value
+
+def _expectInt(value, path: list):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ProjectSchemaError(path, f"expected a whole number, got {type(value).__name__}")
+    
+    if value < 0:
+        raise ProjectSchemaError(path, f"expected a number of at least 0, got {value}")
+    
+    return value
+
+def _expectInts(value, path: list, length: int | None = None):
+    values = _expectSequence(value, path, length)
+    for index, item in enumerate(values):
+        _expectInt(item, path + [index])
+    
+    return values
+
+def _expectStrs(value, path: list):
+    values = _expectSequence(value, path)
+    for index, item in enumerate(values):
+        _expectStr(item, path + [index])
+    
+    return values
+
+def _expectLevelIndex(key, levels: list[LevelInfo], path: list):
+    # Level keys are stored as text since JSON objects only have text keys
+    if isinstance(key, str) and key.isdigit():
+        key = int(key)
+    
+    if not isinstance(key, int) or isinstance(key, bool) or not 0 <= key < len(levels):
+        raise ProjectSchemaError(path, f"{key!r} is not one of the {len(levels)} class levels")
+    
+    return key
+
+def _expectClassIDs(value, levelIndex: int, levels: list[LevelInfo], path: list):
+    classIDs = _expectStrs(value, path)
+    
+    for index, classID in enumerate(classIDs):
+        if classID not in levels[levelIndex].classes:
+            raise ProjectSchemaError(path + [index], f"{classID!r} is not a class of {levels[levelIndex].name}")
+    
+    return classIDs
+
+def parseLevels(levels) -> list[LevelInfo]:
+    parsedLevels = []
+    for levelIndex, levelInfo in enumerate(_expectSequence(levels, ["levels"])):
+        path = ["levels", levelIndex]
+        levelName, classes = _expectSequence(levelInfo, path, 2)
+        
+        parsedClasses = {}
+        for classID, classInfo in _expectDict(classes, path + [1]).items():
+            classPath = path + [1, classID]
+            className, weekInfo = _expectSequence(classInfo, classPath, 2)
+            periodsPerDay, breakPeriods, weekdays = _expectSequence(weekInfo, classPath + [1], 3)
+            
+            weekdays = _expectStrs(weekdays, classPath + [1, 2])
+            periodsPerDay = _expectInts(periodsPerDay, classPath + [1, 0])
+            breakPeriods = _expectInts(breakPeriods, classPath + [1, 1])
+            
+            # Periods and break periods are read by weekday index, so there must be one for every day
+            if len(periodsPerDay) < len(weekdays) or len(breakPeriods) < len(weekdays):
+                raise ProjectSchemaError(classPath + [1], f"{len(weekdays)} weekdays need as many period amounts and break periods, got {len(periodsPerDay)} and {len(breakPeriods)}")
+            
+            parsedClasses[classID] = ClassInfo(levelIndex, classID, _expectStr(className, classPath + [0]), periodsPerDay, breakPeriods, weekdays)
+        
+        parsedLevels.append(LevelInfo(levelIndex, _expectStr(levelName, path + [0]), parsedClasses))
+    
+    return parsedLevels
+
+def parseSubjectTeacherMapping(mappings, levels: list[LevelInfo]) -> dict[str, SubjectMapping]:
+    parsedMappings = {}
+    for subjectID, mapping in _expectDict(mappings, ["subjectTeacherMapping"]).items():
+        path = ["subjectTeacherMapping", subjectID]
+        subjectName, subjectInfo = _expectSequence(mapping, path, 2)
+        subjectInfo = _expectDict(subjectInfo, path + [1])
+        
+        if "&timings" not in subjectInfo:
+            raise ProjectSchemaError(path + [1], "missing \"&timings\"")
+        
+        timings = {}
+        for key, timing in _expectDict(subjectInfo["&timings"], path + [1, "&timings"]).items():
+            levelIndex = _expectLevelIndex(key, levels, path + [1, "&timings", key])
+            timings[levelIndex] = tuple(_expectInts(timing, path + [1, "&timings", key], 2))
+        
+        classes = {}
+        for key, classIDs in _expectDict(subjectInfo.get("&classes", {}), path + [1, "&classes"]).items():
+            levelIndex = _expectLevelIndex(key, levels, path + [1, "&classes", key])
+            classes[levelIndex] = _expectClassIDs(classIDs, levelIndex, levels, path + [1, "&classes", key])
+        
+        teachers = {}
+        for teacherID, teacherInfo in subjectInfo.items():
+            if teacherID.startswith("&"):
+                continue
+            
+            teacherPath = path + [1, teacherID]
+            teacherName, teacherLevels = _expectSequence(teacherInfo, teacherPath, 2)
+            
+            parsedTeacherLevels = {}
+            for key, teacherLevel in _expectDict(teacherLevels, teacherPath + [1]).items():
+                levelPath = teacherPath + [1, key]
+                levelIndex = _expectLevelIndex(key, levels, levelPath)
+                
+                if levelIndex not in timings:
+                    raise ProjectSchemaError(levelPath, f"{levels[levelIndex].name} has no timings for this subject")
+                
+                maxRandomAmt, classIDs = _expectSequence(teacherLevel, levelPath, 2)
+                parsedTeacherLevels[levelIndex] = TeacherLevelInfo(_expectInt(maxRandomAmt, levelPath + [0]), _expectClassIDs(classIDs, levelIndex, levels, levelPath + [1]))
+            
+            teachers[teacherID] = TeacherMapping(teacherID, _expectStr(teacherName, teacherPath + [0]), parsedTeacherLevels)
+        
+        parsedMappings[subjectID] = SubjectMapping(subjectID, _expectStr(subjectName, path + [0]), timings, classes, teachers)
+    
+    return parsedMappings
+
+def parseSubjects(subjects, levels: list[LevelInfo]) -> dict[str, SubjectInfo]:
+    parsedSubjects = {}
+    for subjectID, subject in _expectDict(subjects, ["subjects"]).items():
+        path = ["subjects", subjectID]
+        subjectName, subjectLevels = _expectSequence(subject, path, 2)
+        
+        parsedLevels = {}
+        for key, subjectLevel in _expectDict(subjectLevels, path + [1]).items():
+            levelPath = path + [1, key]
+            levelIndex = _expectLevelIndex(key, levels, levelPath)
+            perDay, perWeek, classes = _expectSequence(subjectLevel, levelPath, 3)
+            
+            placements = {}
+            for classID, placement in _expectDict(classes, levelPath + [2]).items():
+                placementPath = levelPath + [2, classID]
+                
+                if classID not in levels[levelIndex].classes:
+                    raise ProjectSchemaError(placementPath, f"{classID!r} is not a class of {levels[levelIndex].name}")
+                
+                teacher, coords = _expectSequence(placement, placementPath, 2)
+                teacherID, teacherName = _expectSequence(teacher, placementPath + [0], 2)
+                
+                if not isinstance(coords, list):
+                    raise ProjectSchemaError(placementPath + [1], f"expected a list, got {type(coords).__name__}")
+                
+                for coordIndex, coord in enumerate(coords):
+                    coordPath = placementPath + [1, coordIndex]
+                    position, timing, _ = _expectSequence(coord, coordPath, 3)
+                    
+                    _expectInts(position, coordPath + [0], 2)
+                    _expectInts(timing, coordPath + [1], 2)
+                    _expectInt(coord[2], coordPath + [2])
+                
+                placements[classID] = Placement(_expectStr(teacherID, placementPath + [0, 0]), _expectStr(teacherName, placementPath + [0, 1]), coords)
+            
+            parsedLevels[levelIndex] = SubjectLevelInfo(_expectInt(perDay, levelPath + [0]), _expectInt(perWeek, levelPath + [1]), placements)
+        
+        parsedSubjects[subjectID] = SubjectInfo(subjectID, _expectStr(subjectName, path + [0]), parsedLevels)
+    
+    return parsedSubjects
+
+class ProjectSchema:
+    __slots__ = ("levels", "classes", "subjectTeacherMapping", "subjects", "placements")
+    
+    def __init__(self, levels: list[LevelInfo], subjectTeacherMapping: dict[str, SubjectMapping], subjects: dict[str, SubjectInfo] | None = None) -> None:
+        self.levels = levels
+        self.classes = {(classInfo.levelIndex, classID): classInfo for level in levels for classID, classInfo in level.classes.items()}
+        self.subjectTeacherMapping = subjectTeacherMapping
+        
+        self.subjects: dict[str, SubjectInfo] | None = None
+        self.placements: dict[tuple[str, int, str], Placement] = {}
+        self.setSubjects(subjects)
+    
+    @classmethod
+    def fromProject(cls, project: dict):
+        _expectDict(project, [])
+        
+        for key in ("levels", "subjectTeacherMapping"):
+            if key not in project:
+                raise ProjectSchemaError([], f"missing \"{key}\"")
+        
+        levels = parseLevels(project["levels"])
+        subjects = project.get("subjects")
+        
+        return cls(levels, parseSubjectTeacherMapping(project["subjectTeacherMapping"], levels), parseSubjects(subjects, levels) if subjects is not None else None)
+    
+    def setSubjects(self, subjects: dict[str, SubjectInfo] | None):
+        self.subjects = subjects
+        self.placements = {}
+        
+        for subjectID, subjectInfo in (subjects or {}).items():
+            for levelIndex, levelInfo in subjectInfo.levels.items():
+                for classID, placement in levelInfo.classes.items():
+                    self.placements[(subjectID, levelIndex, classID)] = placement
+    
+    def getClass(self, levelIndex: int, classID: str):
+        return self.classes.get((levelIndex, classID))
+    
+    def getTeacherLevel(self, subjectID: str, teacherID: str, levelIndex: int):
+        mapping = self.subjectTeacherMapping.get(subjectID)
+        teacher = mapping.teachers.get(teacherID) if mapping is not None else None
+        
+        return teacher.levels.get(levelIndex) if teacher is not None else None
+    
+    def getPlacement(self, subjectID: str, levelIndex: int, classID: str):
+        return self.placements.get((subjectID, levelIndex, classID))
@@ -0,0 +1,259 @@
+from middle.objects import *
+
+# A generation try buys this many search nodes, so the greedy and backtracking engines share one budget
+NODES_PER_TRY = 100
+
+class _SearchBudgetExceeded(Exception):
+    pass
+
+class BacktrackingSolver:
+    def __init__(self, timetable: Timetable, occupancy, maxNodes: int | None = 2000, timeLimit: float | None = None, fixed: dict[tuple[int, int], str] | None = None) -> None:
+        self.timetable = timetable
+        self.cls = timetable.cls
+        self.occupancy = occupancy
+        
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        
+        self.subjects = sorted([subject for subject in timetable.subjects if subject.id != timetable.freePeriodID and subject.perWeek > 0], key=lambda subject: subject.id)
+        self.subjectIndexes = {subject.id: index for index, subject in enumerate(self.subjects)}
+        
+        self.days = [day for day, _, _ in timetable.weekInfo]
+        self.slots: list[tuple[int, int]] = []
+        for dayIndex, (_, periods, breakPeriod) in enumerate(timetable.weekInfo):
+            for period in range(1, periods + 1):
+                if period != breakPeriod:
+                    self.slots.append((dayIndex, period))
+        self.slotIndexes = {slot: index for index, slot in enumerate(self.slots)}
+        
+        self.demand = [subject.perWeek for subject in self.subjects]
+        self.perDay = [subject.TOTAL for subject in self.subjects]
+        
+        # Other classes never change while this class is being solved, so teacher availability is static
+        self.available: list[list[int]] = []
+        for dayIndex, period in self.slots:
+            self.available.append([
+                subjectIndex for subjectIndex, subject in enumerate(self.subjects)
+                if subject.teacher is None or not occupancy.isBusy(subject.teacher.id, self.days[dayIndex], period, self.cls)
+            ])
+        
+        self.values: list[int | None] = [None for _ in self.slots]
+        self.weekCount = [0 for _ in self.subjects]
+        self.dayCount = [[0 for _ in self.days] for _ in self.subjects]
+        self.spans: list[list[list[int] | None]] = [[None for _ in self.days] for _ in self.subjects]
+        
+        self.freeQuota = max(len(self.slots) - sum(self.demand), 0)
+        self.freeUsed = 0
+        self.mustMeetDemand = sum(self.demand) <= len(self.slots)
+        
+        self.nodes = 0
+        self.stopReason = None
+        
+        self._bestPlaced = -1
+        self._bestValues: list[int | None] = list(self.values)
+        
+        self._fix(dict(fixed or {}))
+    
+    def _fix(self, fixed: dict[tuple[int, int], str]):
+        for subjectIndex, subject in enumerate(self.subjects):
+            if subject.lockedPeriod:
+                startRow, length = subject.lockedPeriod
+                for dayIndex in range(len(self.days)):
+                    for period in range(startRow + 1, startRow + length + 1):
+                        fixed.setdefault((dayIndex, period), subject.id)
+        
+        for slot, subjectID in fixed.items():
+            slotIndex = self.slotIndexes.get(slot)
+            subjectIndex = self.subjectIndexes.get(subjectID)
+            
+            if slotIndex is not None and subjectIndex is not None and self.values[slotIndex] is None:
+                if subjectIndex in self.available[slotIndex] and self._canPlace(subjectIndex, slotIndex):
+                    self._assign(slotIndex, subjectIndex)
+    
+    def _canPlace(self, subjectIndex: int, slotIndex: int):
+        dayIndex, period = self.slots[slotIndex]
+        
+        if self.weekCount[subjectIndex] >= self.demand[subjectIndex] or self.dayCount[subjectIndex][dayIndex] >= self.perDay[subjectIndex]:
+            return False
+        
+        span = self.spans[subjectIndex][dayIndex]
+        
+        return span is None or period == span[0] - 1 or period == span[1] + 1
+    
+    def _assign(self, slotIndex: int, value: int):
+        self.values[slotIndex] = value
+        
+        if value == -1:
+            self.freeUsed += 1
+            return
+        
+        dayIndex, period = self.slots[slotIndex]
+        
+        self.weekCount[value] += 1
+        self.dayCount[value][dayIndex] += 1
+        
+        span = self.spans[value][dayIndex]
+        self.spans[value][dayIndex] = [period, period] if span is None else [min(span[0], period), max(span[1], period)]
+    
+    def _unassign(self, slotIndex: int):
+        value = self.values[slotIndex]
+        self.values[slotIndex] = None
+        
+        if value == -1:
+            self.freeUsed -= 1
+            return
+        
+        dayIndex, period = self.slots[slotIndex]
+        
+        self.weekCount[value] -= 1
+        self.dayCount[value][dayIndex] -= 1
+        
+        span = self.spans[value][dayIndex]
+        if span[0] == span[1]:
+            self.spans[value][dayIndex] = None
+        elif period == span[0]:
+            span[0] += 1
+        else:
+            span[1] -= 1
+    
+    def _demandCanBeMet(self):
+        for subjectIndex in range(len(self.subjects)):
+            remaining = self.demand[subjectIndex] - self.weekCount[subjectIndex]
+            if not remaining:
+                continue
+            
+            dayCapacity = [0 for _ in self.days]
+            for slotIndex, value in enumerate(self.values):
+                if value is None and subjectIndex in self.available[slotIndex]:
+                    dayCapacity[self.slots[slotIndex][0]] += 1
+            
+            capacity = sum(min(amount, self.perDay[subjectIndex] - self.dayCount[subjectIndex][dayIndex]) for dayIndex, amount in enumerate(dayCapacity))
+            if capacity < remaining:
+                return False
+        
+        return True
+    
+    def _placedAmount(self):
+        return sum(self.weekCount)
+    
+    def _search(self, startTime: float) -> bool:
+        self.nodes += 1
+        if (self.maxNodes is not None and self.nodes > self.maxNodes) or (self.timeLimit is not None and time.perf_counter() - startTime >= self.timeLimit):
+            raise _SearchBudgetExceeded()
+        
+        placed = self._placedAmount()
+        if placed > self._bestPlaced:
+            self._bestPlaced = placed
+            self._bestValues = list(self.values)
+        
+        canUseFree = self.freeUsed < self.freeQuota
+        
+        # Most-constrained variable: the open slot with the fewest legal values
+        bestSlot = None
+        bestDomain = None
+        for slotIndex, value in enumerate(self.values):
+            if value is not None:
+                continue
+            
+            domain = [subjectIndex for subjectIndex in self.available[slotIndex] if self._canPlace(subjectIndex, slotIndex)]
+            size = len(domain) + canUseFree
+            
+            if not size:
+                return False
+            
+            if bestDomain is None or size < len(bestDomain) + canUseFree:
+                bestSlot, bestDomain = slotIndex, domain
+                if size == 1:
+                    break
+        
+        if bestSlot is None:
+            return True
+        
+        if self.mustMeetDemand and not self._demandCanBeMet():
+            return False
+        
+        values = sorted(bestDomain, key=lambda subjectIndex: (self.weekCount[subjectIndex] - self.demand[subjectIndex], subjectIndex))
+        if canUseFree:
+            values.append(-1)
+        
+        for value in values:
+            self._assign(bestSlot, value)
+            
+            if self._search(startTime):
+                return True
+            
+            self._unassign(bestSlot)
+        
+        return False
+    
+    def _reset(self, values: list[int | None]):
+        self.values = [None for _ in self.slots]
+        self.weekCount = [0 for _ in self.subjects]
+        self.dayCount = [[0 for _ in self.days] for _ in self.subjects]
+        self.spans = [[None for _ in self.days] for _ in self.subjects]
+        self.freeUsed = 0
+        
+        for slotIndex, value in enumerate(values):
+            if value is not None:
+                self._assign(slotIndex, value)
+    
+    def solve(self):
+        fixedValues = list(self.values)
+        
+        if self.maxNodes == 0:
+            # No tries to spend, so the search is skipped and only the single fill below runs
+            complete = False
+            self.stopReason = STOP_MAX_TRIES
+        else:
+            try:
+                complete = self._search(time.perf_counter())
+            except _SearchBudgetExceeded:
+                complete = False
+                self.stopReason = STOP_TIME_LIMIT if self.maxNodes is None or self.nodes <= self.maxNodes else STOP_MAX_TRIES
+            else:
+                self.stopReason = STOP_PERFECT if complete else STOP_EXHAUSTED
+        
+        if not complete:
+            strictPlaced, strictValues = self._bestPlaced, self._bestValues
+            
+            # No complete table exists within the budget, so fill as much as possible with free periods allowed anywhere
+            self._reset(fixedValues)
+            self.freeQuota = len(self.slots)
+            self.mustMeetDemand = False
+            self.nodes = 0
+            
+            # With free periods allowed anywhere the first descent never backtracks, so it always gets to finish
+            if self.maxNodes is not None:
+                self.maxNodes = max(self.maxNodes, len(self.slots) + 1)
+            
+            try:
+                self._search(time.perf_counter())
+            except _SearchBudgetExceeded:
+                pass
+            
+            self._reset(self._bestValues if self._bestPlaced > strictPlaced else strictValues)
+        
+        return complete
+    
+    def apply(self):
+        slots = {}
+        for dayIndex, (day, periods, _) in enumerate(self.timetable.weekInfo):
+            slots[day] = []
+            for period in range(1, periods + 1):
+                slotIndex = self.slotIndexes.get((dayIndex, period))
+                value = self.values[slotIndex] if slotIndex is not None else None
+                
+                slots[day].append(self.subjects[value] if value is not None and value != -1 else None)
+        
+        self.timetable.fillFromSlots(slots, self.subjects)
+
+def solveTimetable(timetable: Timetable, fixed: dict[tuple[int, int], str] | None = None):
+    maxTries = timetable._maxPerfectTimetableTries
+    
+    solver = BacktrackingSolver(timetable, timetable.cls.school.occupancy, maxTries * NODES_PER_TRY if maxTries is not None else None, timetable._maxGenerationTime, fixed)
+    
+    timetable._foundPerfectTimeTable = solver.solve()
+    timetable.stopReason = solver.stopReason
+    
+    solver.apply()
+    timetable._publish()
@@ -0,0 +1,186 @@
+from imports import *
+
+import struct
+import tempfile
+from array import array
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Container layout: header, then the (optionally compressed) body. The body is the project as compact JSON, read back
+# by the C json module, followed by every subject coordinate packed into one int32 array
+TTBL_MAGIC = b"TTBL"
+TTBL_VERSION = 2
+TTBL_HEADER = struct.Struct("<4sHBBQ")
+TTBL_BODY_HEADER = struct.Struct("<QQ")
+
+COMPRESSION_NONE = 0
+COMPRESSION_GZIP = 1
+COMPRESSION_ZSTD = 2
+
+DEFAULT_COMPRESSION = COMPRESSION_GZIP
+DEFAULT_COMPRESSION_LEVELS = {COMPRESSION_NONE: 0, COMPRESSION_GZIP: 6, COMPRESSION_ZSTD: 10}
+
+# A coordinate list is stored in the JSON as {COORDS_KEY: [first coordinate, coordinate amount]} into the packed array
+COORDS_KEY = "&ttbl-coords"
+COORD_WIDTH = 5
+
+class TtblFormatError(ValueError):
+    pass
+
+def _isCoord(value):
+    # ((dayIndex, period), (total, perWeek), remainderAmount)
+    if not isinstance(value, (list, tuple)) or len(value) != 3:
+        return False
+    
+    position, timing, remainder = value
+    
+    return (
+        isinstance(position, (list, tuple)) and len(position) == 2 and isinstance(timing, (list, tuple)) and len(timing) == 2 and
+        all(type(item) is int and -2 ** 31 <= item < 2 ** 31 for item in (*position, *timing, remainder))
+    )
+
+def _packCoords(value, packed: array):
+    if isinstance(value, dict):
+        if len(value) == 1 and COORDS_KEY in value:
+            raise TypeError(f"A mapping holding only {COORDS_KEY!r} cannot be stored in a .ttbl file")
+        
+        return {key: _packCoords(item, packed) for key, item in value.items()}
+    
+    if isinstance(value, (list, tuple)):
+        if value and all(_isCoord(item) for item in value):
+            start = len(packed) // COORD_WIDTH
+            packed.extend(number for (dayIndex, period), (total, perWeek), remainder in value for number in (dayIndex, period, total, perWeek, remainder))
+            
+            return {COORDS_KEY: [start, len(value)]}
+        
+        return [_packCoords(item, packed) for item in value]
+    
+    return value
+
+def _makeCoordsHook(packed: array):
+    # Every coordinate is built in one pass up front, so each coordinate list is only a slice
+    numbers = iter(packed)
+    coords = [[[dayIndex, period], [total, perWeek], remainder] for dayIndex, period, total, perWeek, remainder in zip(*[numbers] * COORD_WIDTH)]
+    
+    def hook(obj: dict):
+        if len(obj) != 1 or COORDS_KEY not in obj:
+            return obj
+        
+        start, amount = obj[COORDS_KEY]
+        if start < 0 or amount < 0 or start + amount > len(coords):
+            raise TtblFormatError(f"Coordinates {start} to {start + amount} are outside the packed array")
+        
+        return coords[start:start + amount]
+    
+    return hook
+
+def _compress(body: bytes, compression: int, level: int):
+    if compression == COMPRESSION_NONE:
+        return body
+    if compression == COMPRESSION_GZIP:
+        return gzip.compress(body, level, mtime=0)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    
+    raise ValueError(f"Unknown compression {compression}")
+
+def _decompress(payload: bytes, compression: int):
+    if compression == COMPRESSION_NONE:
+        return payload
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(payload)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise TtblFormatError("This file is zstd compressed, which needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    
+    raise TtblFormatError(f"Unknown compression {compression}")
+
+def isContainer(data: bytes):
+    return data[:len(TTBL_MAGIC)] == TTBL_MAGIC
+
+def dumpProject(project: dict, compression: int = DEFAULT_COMPRESSION, level: int | None = None):
+    packed = array("i")
+    tree = json.dumps(_packCoords(project, packed), separators=(",", ":"), ensure_ascii=False).encode()
+    
+    if sys.byteorder != "little":
+        packed.byteswap()
+    body = TTBL_BODY_HEADER.pack(len(tree), len(packed)) + tree + packed.tobytes()
+    
+    level = DEFAULT_COMPRESSION_LEVELS.get(compression, 0) if level is None else level
+    
+    return TTBL_HEADER.pack(TTBL_MAGIC, TTBL_VERSION, compression, 0, len(body)) + _compress(body, compression, level)
+
+def loadProject(data: bytes):
+    # Files from before the container are gzipped JSON, or plain JSON when they were never converted
+    if not isContainer(data):
+        return json.loads(gzip.decompress(data) if data[:2] == b"\x1f\x8b" else data)
+    
+    if len(data) < TTBL_HEADER.size:
+        raise TtblFormatError("File is too short for a header")
+    
+    _, version, compression, _, bodySize = TTBL_HEADER.unpack_from(data)
+    if version != TTBL_VERSION:
+        raise TtblFormatError(f"File version {version} is not the supported version {TTBL_VERSION}")
+    
+    try:
+        body = _decompress(data[TTBL_HEADER.size:], compression)
+    except TtblFormatError:
+        raise
+    except Exception as e:
+        raise TtblFormatError(f"Body could not be decompressed: {e}") from e
+    if len(body) != bodySize:
+        raise TtblFormatError(f"Body is {len(body)} bytes but the header expects {bodySize}")
+    
+    if len(body) < TTBL_BODY_HEADER.size:
+        raise TtblFormatError("Body is too short for its header")
+    
+    treeSize, numberAmount = TTBL_BODY_HEADER.unpack_from(body)
+    
+    packed = array("i")
+    if TTBL_BODY_HEADER.size + treeSize + numberAmount * packed.itemsize != len(body):
+        raise TtblFormatError(f"Body is {len(body)} bytes but its header expects {TTBL_BODY_HEADER.size + treeSize + numberAmount * packed.itemsize}")
+    
+    packed.frombytes(body[TTBL_BODY_HEADER.size + treeSize:])
+    if sys.byteorder != "little":
+        packed.byteswap()
+    
+    try:
+        return json.loads(body[TTBL_BODY_HEADER.size:TTBL_BODY_HEADER.size + treeSize], object_hook=_makeCoordsHook(packed))
+    except TtblFormatError:
+        raise
+    except (TypeError, ValueError) as e:
+        raise TtblFormatError(f"Project could not be read: {e}") from e
+
+def writeFileAtomically(path: str, data: bytes):
+    # Written beside the target and renamed over it, so a crash mid-write leaves the previous file whole
+    handle, tempPath = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        
+        if os.path.exists(path):
+            shutil.copymode(path, tempPath)
+        else:
+            os.chmod(tempPath, 0o644)
+        
+        os.replace(tempPath, path)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+def readProjectFile(path: str):
+    with open(path, "rb") as file:
+        return loadProject(file.read())
+
+def writeProjectFile(path: str, project: dict, compression: int = DEFAULT_COMPRESSION, level: int | None = None):
+    writeFileAtomically(path, dumpProject(project, compression, level))